@@ -1,12 +1,15 @@
 import speech_recognition as sr
 import webbrowser
-import pyttsx3
+import re
 import musiclibrary
 import requests
 import google.generativeai as genai
 import psutil
 import config
-import ollama
+import llm_cache
+import intent_router
+from stt_backends import stt
+from tts_service import tts, PRIORITY_CHAT
 
 # --- IMPORT MODULES ---
 try:
@@ -29,10 +32,6 @@ except ImportError:
 
 # --- INITIALIZATION ---
 recognizer = sr.Recognizer()
-try:
-    engine = pyttsx3.init()
-except:
-    engine = None
 
 model = None
 if hasattr(config, 'GEMINI_API_KEY') and config.GEMINI_API_KEY:
@@ -41,12 +40,38 @@ if hasattr(config, 'GEMINI_API_KEY') and config.GEMINI_API_KEY:
         model = genai.GenerativeModel('gemini-1.5-flash')
     except: pass
 
-def speak(text):
-    if not engine: return
-    try:
-        engine.say(text)
-        engine.runAndWait()
-    except: pass
+def speak(text, priority=PRIORITY_CHAT):
+    """Non-blocking: queued on the shared speech service."""
+    tts.say(text, priority)
+
+_SENTENCE = re.compile(r"([^\n]+?[.!?])(?=\s)|([^\n]+)\n")
+
+def split_sentences(buffer):
+    """Returns (complete_sentences, remainder) for a growing text buffer."""
+    sentences, pos = [], 0
+    for m in _SENTENCE.finditer(buffer):
+        s = (m.group(1) or m.group(2)).strip()
+        if s: sentences.append(s)
+        pos = m.end()
+    return sentences, buffer[pos:]
+
+class SentenceSpeaker:
+    """Queues complete sentences on the speech service while the caller keeps producing text."""
+
+    def __init__(self, priority=PRIORITY_CHAT):
+        self.pending = ""
+        self.priority = priority
+
+    def feed(self, chunk):
+        self.pending += chunk
+        sentences, self.pending = split_sentences(self.pending)
+        for s in sentences:
+            tts.say(s, self.priority, dedupe=False) # A repeated sentence in an answer is still part of it
+
+    def close(self):
+        if self.pending.strip():
+            tts.say(self.pending.strip(), self.priority, dedupe=False)
+        self.pending = ""
 
 # --- CORE FUNCTIONS ---
 def get_system_stats():
@@ -63,24 +88,56 @@ def get_weather():
         return c.get('temperature_2m', 'N/A'), c.get('relative_humidity_2m', 'N/A'), c.get('wind_speed_10m', 'N/A')
     except: return "N/A", "N/A", "N/A"
 
+_calibrated = False
+
+def transcribe(audio):
+    try:
+        return stt.transcribe(audio).lower()
+    except: return ""
+
 def listen_input():
+    global _calibrated
     try:
         with sr.Microphone() as source:
-            recognizer.adjust_for_ambient_noise(source, duration=0.5)
+            if not _calibrated:
+                # One-time calibration; dynamic_energy_threshold keeps adapting afterwards
+                recognizer.adjust_for_ambient_noise(source, duration=0.5)
+                _calibrated = True
             audio = recognizer.listen(source, timeout=8, phrase_time_limit=10)
-            return recognizer.recognize_google(audio).lower()
+            return transcribe(audio)
     except: return ""
 
 def aiprocess(command):
     try:
-        response = ollama.chat(
-            model='llama3.2',
-            messages=[{'role': 'system', 'content': 'You are J.A.R.V.I.S. Keep answers short, technical.'}, {'role': 'user', 'content': command}]
+        return llm_cache.chat(
+            'core.chat',
+            [{'role': 'system', 'content': 'You are J.A.R.V.I.S. Keep answers short, technical.'}, {'role': 'user', 'content': command}]
         )
-        return response['message']['content']
     except Exception as e:
         return f"AI Error: {e}"
 
+def aiprocess_stream(command, on_update=None):
+    """
+    Streaming aiprocess: tokens are spoken sentence by sentence while the model
+    keeps generating. on_update(text_so_far) is called for every new chunk.
+    """
+    speaker = SentenceSpeaker()
+    text = ""
+    try:
+        for piece in llm_cache.chat_stream(
+            'core.chat',
+            [{'role': 'system', 'content': 'You are J.A.R.V.I.S. Keep answers short, technical.'}, {'role': 'user', 'content': command}]
+        ):
+            text += piece
+            speaker.feed(piece)
+            if on_update: on_update(text)
+    except Exception as e:
+        text = f"AI Error: {e}"
+        speaker.feed(text)
+        if on_update: on_update(text)
+    speaker.close()
+    return text
+
 def get_news():
     if not hasattr(config, 'NEWS_API_KEY'): return ["Config Missing"]
     try:
@@ -89,32 +146,41 @@ def get_news():
         return [a['title'] for a in r.get('articles', [])][:5] if r.get('status')=='ok' else ["News Error"]
     except: return ["News Error"]
 
-def processcommand(c):
-    c = c.lower()
-    resp = ""
+def play_song(song):
+    song = song.strip().lower()
+    for title, url in musiclibrary.music.items():
+        if title.lower() == song:
+            webbrowser.open(url)
+            return f"Playing {title}."
+    return "Song not found."
 
+def quick_response(c):
+    """Keyword commands answered without the LLM. Returns None when nothing matches."""
+    c = c.lower()
     if c.startswith("open "):
         site = c.replace("open ", "").replace(" website", "").strip()
         webbrowser.open(f"https://duckduckgo.com/?q=!ducky+{site}")
-        resp = f"Opening {site}."
+        return f"Opening {site}."
     elif c.startswith("play"):
-        try:
-            song = c.split(" ", 1)[1]
-            if song in musiclibrary.music:
-                webbrowser.open(musiclibrary.music[song])
-                resp = f"Playing {song}."
-            else: resp = "Song not found."
-        except: resp = "Error."
+        try: return play_song(c.split(" ", 1)[1])
+        except: return "Error."
     elif "system" in c:
         cpu, ram, _ = get_system_stats()
-        resp = f"CPU: {cpu}%, RAM: {ram}%."
+        return f"CPU: {cpu}%, RAM: {ram}%."
     elif "weather" in c:
         t, h, _ = get_weather()
-        resp = f"{t}°C, {h}% Humidity."
+        return f"{t}°C, {h}% Humidity."
+    return intent_router.match_core(c)
+
+def processcommand(c, on_update=None):
+    c = c.lower()
+    resp = quick_response(c)
+
+    if resp is not None: pass
     elif "email" in c: resp = "Use Email Protocol."
     elif "message" in c: resp = "Use Messaging Assistant."
     elif "remind" in c or "list" in c: resp = "Use Smart Reminders Tab."
-    else: resp = aiprocess(c)
+    else: return aiprocess_stream(c, on_update) # Speaks while generating
 
     speak(resp)
-    return resp
\ No newline at end of file
+    return resp
@@ -0,0 +1,67 @@
+import time
+import cv2
+import numpy as np
+
+IDLE, ARMED = "idle", "armed"
+
+class AdaptiveRate:
+    """
+    Idle / armed scheduling for one camera's capture + analysis loops.
+    - idle: idle_fps frames a second are decoded and analysed (the rest are only grabbed)
+    - armed: up to armed_fps (0 = every frame), entered on motion or a global scene change
+    - back to idle after quiet_s seconds without either; starts armed, so the detectors warm up at full rate
+    Process CPU time is booked against the mode it was spent in, for the diagnostics panel.
+    """
+
+    def __init__(self, idle_fps=2, armed_fps=15, quiet_s=15, scene_threshold=12.0, enabled=True):
+        self.enabled = enabled # False = always armed (the old fixed-rate behaviour)
+        self.idle_fps = idle_fps
+        self.armed_fps = armed_fps
+        self.quiet_s = quiet_s
+        self.scene_threshold = scene_threshold # Mean gray-level shift of the whole frame
+        self.mode = ARMED
+        self.last_active = time.time()
+        self.escalations = 0
+        self.thumb = None
+        self.usage = {IDLE: [0.0, 0.0], ARMED: [0.0, 0.0]} # mode -> [cpu s, wall s]
+        self.last_cpu, self.last_wall = time.process_time(), time.time()
+
+    @property
+    def interval(self):
+        """Seconds between analysed frames in the current mode (0 = as fast as frames come)."""
+        fps = self.idle_fps if self.mode == IDLE else self.armed_fps
+        return 1.0 / fps if fps else 0.0
+
+    def scene_changed(self, frame):
+        """Compares a 32x24 gray thumbnail with the previous analysed frame (lights, camera bumped)."""
+        small = cv2.resize(frame, (32, 24), interpolation=cv2.INTER_AREA)
+        gray = (cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small).astype(np.int16)
+        prev, self.thumb = self.thumb, gray
+        return prev is not None and float(np.abs(gray - prev).mean()) > self.scene_threshold
+
+    def update(self, active, now=None):
+        """One analysis result (motion or scene change seen). Returns True when the mode changed."""
+        now = now or time.time()
+        self._account(now)
+        if active:
+            self.last_active = now
+            if self.mode == IDLE:
+                self.mode = ARMED
+                self.escalations += 1
+                return True
+        elif self.enabled and self.mode == ARMED and now - self.last_active > self.quiet_s:
+            self.mode = IDLE
+            return True
+        return False
+
+    def _account(self, now):
+        cpu = time.process_time()
+        usage = self.usage[self.mode]
+        usage[0] += cpu - self.last_cpu
+        usage[1] += now - self.last_wall
+        self.last_cpu, self.last_wall = cpu, now
+
+    def cpu_percent(self, mode):
+        """Average CPU of this process while in mode (100 = one full core)."""
+        cpu, wall = self.usage[mode]
+        return round(cpu / wall * 100, 1) if wall else 0.0
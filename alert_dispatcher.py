@@ -0,0 +1,78 @@
+import time
+import queue
+import random
+import threading
+
+class AlertDispatcher:
+    """
+    Fans security events out to independent delivery channels (voice, email, telegram, evidence).
+    - each channel has its own bounded queue and worker: a slow SMTP server never delays evidence
+    - failed deliveries are retried with exponential backoff (plus jitter)
+    - dispatch() never blocks; a full channel queue drops the event and counts it
+    """
+
+    def __init__(self, queue_size=16):
+        self.queue_size = queue_size
+        self.channels = {}
+
+    def add_channel(self, name, handler, enabled=None, retries=3, backoff=1.0, max_backoff=30.0):
+        """
+        handler(event) delivers one event. Failure = exception or a (False, reason) return,
+        matching the send_email / send_telegram convention.
+        """
+        ch = {
+            "name": name, "handler": handler, "enabled": enabled or (lambda: True),
+            "retries": retries, "backoff": backoff, "max_backoff": max_backoff,
+            "queue": queue.Queue(maxsize=self.queue_size),
+            "stats": {"sent": 0, "failed": 0, "retries": 0, "dropped": 0,
+                      "latency_ms": 0.0, "max_latency_ms": 0.0, "last_error": None},
+        }
+        ch["thread"] = threading.Thread(target=self._worker, args=(ch,), name=f"alert-{name}", daemon=True)
+        ch["thread"].start()
+        self.channels[name] = ch
+
+    def dispatch(self, event):
+        """Queues event on every enabled channel. Returns the channels it was queued on."""
+        queued = []
+        for name, ch in self.channels.items():
+            try:
+                if not ch["enabled"](): continue
+                ch["queue"].put_nowait((time.time(), event))
+                queued.append(name)
+            except queue.Full:
+                ch["stats"]["dropped"] += 1
+        return queued
+
+    def _deliver(self, ch, event):
+        result = ch["handler"](event)
+        if isinstance(result, tuple) and result and result[0] is False:
+            raise RuntimeError(result[1] if len(result) > 1 else "delivery failed")
+
+    def _worker(self, ch):
+        stats = ch["stats"]
+        while True:
+            queued_at, event = ch["queue"].get()
+            for attempt in range(ch["retries"] + 1):
+                try:
+                    self._deliver(ch, event)
+                    # End-to-end latency: queued -> delivered, including any backoff
+                    ms = (time.time() - queued_at) * 1000
+                    stats["sent"] += 1
+                    stats["latency_ms"] = ms if stats["sent"] == 1 else 0.8 * stats["latency_ms"] + 0.2 * ms
+                    stats["max_latency_ms"] = max(stats["max_latency_ms"], ms)
+                    break
+                except Exception as e:
+                    stats["last_error"] = str(e)
+                    if attempt == ch["retries"]:
+                        stats["failed"] += 1
+                        print(f"Alert Error ({ch['name']}): {e}")
+                        break
+                    stats["retries"] += 1
+                    delay = min(ch["max_backoff"], ch["backoff"] * 2 ** attempt)
+                    time.sleep(delay * random.uniform(0.8, 1.2))
+
+    def stats(self):
+        return {name: dict(ch["stats"], queued=ch["queue"].qsize(),
+                           latency_ms=round(ch["stats"]["latency_ms"], 1),
+                           max_latency_ms=round(ch["stats"]["max_latency_ms"], 1))
+                for name, ch in self.channels.items()}
@@ -1,12 +1,14 @@
 import streamlit as st
-import time
 import datetime
 import os
 import pandas as pd
 import yt_dlp
 import tkinter as tk
 from tkinter import filedialog
-from Project_core import processcommand, listen_input, get_system_stats, get_weather
+from Project_core import listen_input, transcribe, get_system_stats, get_weather
+import llm_cache
+from llm_gateway import gateway
+from stt_backends import stt
 
 # --- IMPORT MODULES ---
 # Ensure these files are in the same directory as app.py
@@ -15,6 +17,8 @@ from messaging_module import MessagingAssistant
 from reminders_module import RemindersAssistant
 from desktop_module import DesktopAssistant
 from security_module import SecuritySystem
+from command_dispatcher import CommandDispatcher
+from audio_service import AudioService
 
 # --- IMPORT UI MODULES ---
 import ui_desktop  # Separate UI file for Desktop Control
@@ -37,6 +41,8 @@ if 'email_bot' not in st.session_state:
 # We use cache_resource because they run background threads (schedulers, surveillance)
 @st.cache_resource
 def get_bots():
+    # Preload the local model while the rest of the UI comes up, and keep it resident
+    gateway.start_keep_alive(llm_cache.DEFAULT_MODEL)
     return MessagingAssistant(), RemindersAssistant(), DesktopAssistant(), SecuritySystem()
 
 msg_bot, rem_bot, desk_bot, sec_bot = get_bots()
@@ -45,6 +51,41 @@ msg_bot, rem_bot, desk_bot, sec_bot = get_bots()
 sec_bot.email_bot = st.session_state.email_bot
 sec_bot.msg_bot = msg_bot
 
+# 3. Command Center Dispatcher (one classification call across all modules)
+if 'dispatcher' not in st.session_state:
+    st.session_state.dispatcher = CommandDispatcher(sec_bot, desk_bot, rem_bot, msg_bot, st.session_state.email_bot)
+dispatcher = st.session_state.dispatcher
+
+# 4. Always-on voice (wake word -> dispatcher), shared by all sessions
+def email_draft_from(route):
+    return {
+        "to": route.get('recipient_email') or route.get('recipient_name') or "",
+        "subject": route.get('subject') or "",
+        "body": route.get('body') or ""
+    }
+
+@st.cache_resource
+def get_voice_service():
+    voice_dispatcher = CommandDispatcher(sec_bot, desk_bot, rem_bot, msg_bot, EmailAssistant())
+    drafts = {} # Email drafts from spoken commands, picked up by the Email Protocol page
+
+    def on_command(text):
+        res = voice_dispatcher.dispatch(text)
+        route = voice_dispatcher.last_result or {}
+        if route.get('module') == 'email': drafts['email'] = email_draft_from(route)
+        return res
+
+    return AudioService(transcribe, on_command=on_command), drafts
+
+voice, voice_drafts = get_voice_service()
+
+def run_command(txt, on_update=None):
+    res = dispatcher.dispatch(txt, on_update)
+    route = dispatcher.last_result or {}
+    if route.get('module') == 'email':
+        st.session_state['email_draft'] = email_draft_from(route)
+    return res
+
 # --- CUSTOM CSS STYLING (THEME ENGINE) ---
 st.markdown("""
 <style>
@@ -266,6 +307,15 @@ with st.sidebar:
     
     st.divider()
     
+    # Always-on Voice
+    voice_on = st.toggle("ALWAYS-ON VOICE", value=voice.running, help=f"Say '{voice.wake_word}' followed by a command")
+    if voice_on and not voice.running:
+        st.toast(voice.start())
+    elif not voice_on and voice.running:
+        st.toast(voice.stop())
+    if voice.running:
+        st.caption(f"MIC: {voice.state.upper()} | {voice.stats['commands']} COMMANDS")
+        
     # Active Reminders Counter
     pending_count = len([r for r in rem_bot.reminders if r['status'] == 'pending'])
     if pending_count > 0:
@@ -280,6 +330,12 @@ with st.sidebar:
     st.progress(cpu / 100)
     st.markdown(f"<small>RAM USAGE</small>", unsafe_allow_html=True)
     st.progress(ram / 100)
+    llm_state = gateway.model_status(llm_cache.DEFAULT_MODEL)
+    llm_color = {"warm": "#00ff88", "warming": "#ffcc00"}.get(llm_state, "#ff3333")
+    st.markdown(f"<small>LLM MODEL: <span style='color:{llm_color}'>{llm_state.upper()}</span></small>", unsafe_allow_html=True)
+    st.markdown(f"<small>SPEECH ENGINE: {(stt.preferred() or 'NONE').upper()}</small>", unsafe_allow_html=True)
+    cache_stats = llm_cache.cache.stats()
+    st.markdown(f"<small>LLM CACHE: {cache_stats['hits']} HITS / {cache_stats['misses']} MISSES ({cache_stats['saved_s']}s SAVED)</small>", unsafe_allow_html=True)
     
     st.divider()
     st.markdown("<div style='text-align:center; color:#666; font-size:10px;'>ARMOR AI v5.0<br>SECURE CONNECTION</div>", unsafe_allow_html=True)
@@ -306,6 +362,11 @@ st.write("") # Spacer
 if mode == "🎙️ COMMAND CENTER":
     if 'history' not in st.session_state: st.session_state['history'] = []
     
+    # Pull in commands handled by the always-on voice service since the last rerun
+    seen = st.session_state.get('voice_seen', 0)
+    st.session_state['history'].extend(voice.history[seen:])
+    st.session_state['voice_seen'] = len(voice.history)
+    
     # Layout: Left (Reactor/Controls) | Right (Chat Log/Info)
     c1, c2 = st.columns([1, 1.5])
     
@@ -332,16 +393,11 @@ if mode == "🎙️ COMMAND CENTER":
             with st.spinner("LISTENING..."):
                 txt = listen_input()
                 if txt:
-                    # Check for Security Commands via Voice
-                    sec_parsed = sec_bot.parse_security_command(txt)
-                    if sec_parsed and sec_parsed.get('intent') in ['activate', 'deactivate']:
-                        if sec_parsed['intent'] == 'activate':
-                            res = sec_bot.start_surveillance()
-                        else:
-                            res = sec_bot.stop_surveillance()
-                    else:
-                        res = processcommand(txt)
-                        
+                    # Stream the answer into a live bubble while it is being spoken
+                    live = c2.empty()
+                    def show_partial(partial):
+                        live.markdown(f'<div class="chat-container"><div class="bubble bubble-user">{txt}</div><div class="bubble bubble-ai">{partial}▌</div></div>', unsafe_allow_html=True)
+                    res = run_command(txt, show_partial)
                     st.session_state['history'].append((txt, res))
                     st.rerun()
                 else:
@@ -351,7 +407,7 @@ if mode == "🎙️ COMMAND CENTER":
         def submit():
             txt = st.session_state.txt_input
             if txt:
-                response = processcommand(txt)
+                response = run_command(txt)
                 st.session_state['history'].append((txt, response))
                 st.session_state.txt_input = ""
         
@@ -404,7 +460,25 @@ elif mode == "🛡️ SECURITY MODE":
                 st.rerun()
         else:
             if st.button("🟢 ACTIVATE SURVEILLANCE", type="primary", use_container_width=True):
-                sec_bot.start_surveillance()
+                msg = sec_bot.start_surveillance()
+                if sec_bot.active: st.rerun()
+                st.warning(msg) # Previous run still releasing the cameras
+        fs = sec_bot.frame_stats
+        st.caption(f"FRAMES: {fs['captured']} CAPTURED / {fs['analyzed']} ANALYZED / {fs['dropped']} DROPPED")
+        if sec_bot.active:
+            st.caption(f"MODE: {fs['armed']}/{len(sec_bot.cameras.cameras)} ARMED | CPU IDLE {fs['idle_cpu']}% / ARMED {fs['armed_cpu']}% | {fs['escalations']} ESCALATIONS")
+            st.caption(f"MOTION: {fs['motion_ms']} ms, {fs['motion_hits']}/{fs['analyzed']} FRAMES | "
+                       f"VERIFY: {fs['verify_ms']} ms, {fs['verify_hits']}/{fs['verify_calls']} CONFIRMED")
+        with st.expander("ALERT DELIVERY"):
+            for name, s in sec_bot.alerts.stats().items():
+                st.caption(f"{name.upper()}: {s['sent']} SENT / {s['failed']} FAILED / {s['dropped']} DROPPED | {s['latency_ms']} ms AVG")
+        with st.expander("STORAGE"):
+            rs = sec_bot.retention.stats
+            budget = sec_bot.retention.max_bytes
+            st.caption(f"CAPTURES: {rs['used_mb']} MB" + (f" / {budget // 1024 // 1024} MB BUDGET" if budget else ""))
+            st.caption(f"EVICTED: {rs['evicted']} ({rs['freed_mb']} MB) | RECOMPRESSED: {rs['recompressed']} | DUPLICATES SKIPPED: {sec_bot.dedup.skipped}")
+            if st.button("RUN RETENTION NOW", use_container_width=True):
+                sec_bot.apply_retention()
                 st.rerun()
                 
         st.divider()
@@ -419,40 +493,94 @@ elif mode == "🛡️ SECURITY MODE":
         st.markdown('<div class="armor-card">', unsafe_allow_html=True)
         st.markdown("#### LIVE FEED")
         
-        feed_placeholder = st.empty()
+        cam_count = len(sec_bot.cameras.cameras)
+        feed_cols = st.columns(min(cam_count, 2))
         
         if sec_bot.active:
-            # Loop for live feed simulation
-            while True:
-                if sec_bot.latest_frame is not None:
-                    feed_placeholder.image(sec_bot.latest_frame, channels="RGB", use_container_width=True)
+            # The browser pulls each camera's MJPEG stream itself; this script run returns immediately
+            for cam_id in range(cam_count):
+                col = feed_cols[cam_id % len(feed_cols)]
+                url = sec_bot.stream_url(cam_id)
+                if url:
+                    col.markdown(f'<img src="{url}" style="width:100%; border-radius:4px;" alt="Initializing Camera Feed...">', unsafe_allow_html=True)
                 else:
-                    feed_placeholder.warning("Initializing Camera Feed...")
-                time.sleep(0.1)
+                    # Stream server unavailable: single snapshot, refreshed on the next rerun
+                    frame = sec_bot.frame_for(cam_id)
+                    if frame is not None: col.image(frame, channels="RGB", use_container_width=True)
+                    else: col.warning("Initializing Camera Feed...")
+                if cam_count > 1: col.caption(sec_bot.cameras.name(cam_id))
+            st.caption(f"STREAM: {sec_bot.stream.stats()['viewers']} VIEWERS")
         else:
-            feed_placeholder.info("Camera Offline. Activate System to view feed.")
+            feed_cols[0].info("Camera Offline. Activate System to view feed.")
             
         st.markdown('</div>', unsafe_allow_html=True)
 
-    # Logs Section
+    # Logs Section (paginated gallery: thumbnails only, full resolution on demand)
     st.markdown("### 📋 SECURITY LOGS")
-    logs = sec_bot.load_logs()
+    f1, f2, f3 = st.columns([2, 2, 1])
+    today = datetime.date.today()
+    date_range = f1.date_input("Date Range", value=(today - datetime.timedelta(days=7), today))
+    event_filter = f2.selectbox("Event Type", ["All"] + sec_bot.events.event_types())
+    per_page = f3.selectbox("Per Page", [12, 24, 48])
+    
+    # Date range -> [start 00:00, day after end 00:00)
+    if isinstance(date_range, tuple):
+        d_from, d_to = (date_range[0], date_range[-1]) if date_range else (today, today) # Half-picked range
+    else:
+        d_from = d_to = date_range
+    q_start = datetime.datetime.combine(d_from, datetime.time.min)
+    q_end = datetime.datetime.combine(d_to + datetime.timedelta(days=1), datetime.time.min)
+    q_event = None if event_filter == "All" else event_filter
+    
+    log_total = sec_bot.events.count(q_start, q_end, q_event)
+    pages = max(1, -(-log_total // per_page))
+    page = min(st.session_state.get('log_page', 1), pages)
+    logs = sec_bot.load_logs(limit=per_page, offset=(page - 1) * per_page, start=q_start, end=q_end, event=q_event)
+    
+    # Full-resolution viewer (only the selected capture is ever sent at full size)
+    viewing = st.session_state.get('log_view')
+    if viewing:
+        full_path = os.path.join(sec_bot.capture_dir, viewing)
+        v1, v2 = st.columns([5, 1])
+        v1.markdown(f"**{viewing}**")
+        if v2.button("✖ CLOSE", use_container_width=True):
+            st.session_state['log_view'] = None
+            st.rerun()
+        if os.path.exists(full_path):
+            if full_path.endswith(('.webm', '.mp4')): st.video(full_path)
+            else: st.image(full_path, use_container_width=True)
+        else:
+            st.warning("File no longer on disk.")
+    
     if logs:
+        st.caption(f"{log_total} EVENTS | PAGE {page} OF {pages}")
         for i in range(0, len(logs), 3):
             cols = st.columns(3)
             for j in range(3):
                 if i + j < len(logs):
                     entry = logs[i+j]
                     with cols[j]:
+                        cam = f" · {entry['camera']}" if entry.get('camera') else ""
                         st.markdown(f"""
                         <div class="armor-card" style="padding:10px;">
-                            <small style="color:#ff3333">{entry['timestamp']}</small><br>
+                            <small style="color:#ff3333">{entry['timestamp']}{cam}</small><br>
                             <strong>{entry['event']}</strong>
                         </div>
                         """, unsafe_allow_html=True)
-                        img_path = os.path.join("security_captures", entry['file'])
-                        if os.path.exists(img_path):
-                            st.image(img_path)
+                        thumb = sec_bot.thumbs.get(entry['file']) if entry['file'] else None
+                        if thumb: st.image(thumb, use_container_width=True)
+                        label = "▶ PLAY CLIP" if (entry['file'] or "").endswith(('.webm', '.mp4')) else "🔍 VIEW FULL"
+                        if entry['file'] and st.button(label, key=f"view_{entry['id']}", use_container_width=True):
+                            st.session_state['log_view'] = entry['file']
+                            st.rerun()
+        p1, p2, p3 = st.columns([1, 2, 1])
+        if p1.button("◀ PREV", disabled=page <= 1, use_container_width=True):
+            st.session_state['log_page'] = page - 1
+            st.rerun()
+        p2.markdown(f"<div style='text-align:center; padding-top:8px;'>PAGE {page} / {pages}</div>", unsafe_allow_html=True)
+        if p3.button("NEXT ▶", disabled=page >= pages, use_container_width=True):
+            st.session_state['log_page'] = page + 1
+            st.rerun()
     else:
         st.info("No security events recorded.")
 
@@ -657,6 +785,8 @@ elif mode == "📥 DOWNLOADER":
 # MODULE 6: EMAIL PROTOCOL
 # ==========================================
 elif mode == "✉️ EMAIL PROTOCOL":
+    if 'email' in voice_drafts:
+        st.session_state['email_draft'] = voice_drafts.pop('email') # Spoken "email X ..." since the last visit
     if 'email_draft' not in st.session_state:
         st.session_state['email_draft'] = {"to": "", "subject": "", "body": ""}
 
@@ -826,6 +956,9 @@ elif mode == "💬 MESSAGING":
         col_h, col_r = st.columns([4, 1])
         col_h.markdown("#### LIVE TELEGRAM FEED")
         if col_r.button("REFRESH"): st.rerun()
+        if msg_bot.telegram:
+            ts = msg_bot.telegram.stats
+            st.caption(f"BOT: {ts['sent']} SENT / {ts['failed']} FAILED | {ts['latency_ms']} ms AVG")
         
         if msg_bot.incoming_log:
             for item in msg_bot.incoming_log:
@@ -0,0 +1,168 @@
+import re
+import time
+import array
+import math
+import queue
+import threading
+import collections
+import speech_recognition as sr
+import config
+
+class AudioService:
+    """
+    Always-on voice input.
+    One microphone stream stays open; a cheap energy VAD with an adaptive
+    noise floor cuts it into utterances, a wake word is spotted offline
+    (pocketsphinx keyword search) and finished commands are handed to
+    on_command(text) through a queue, off the capture thread.
+    """
+
+    def __init__(self, transcribe, on_command=None, wake_word=None, follow_up=6.0,
+                 onset_ms=90, hangover_ms=700, preroll_ms=300, max_utterance_s=12,
+                 energy_ratio=2.5, min_energy=150):
+        self.transcribe = transcribe # AudioData -> text ("" if nothing understood)
+        self.on_command = on_command
+        self.wake_word = (wake_word or getattr(config, 'WAKE_WORD', "jarvis")).lower()
+        self.follow_up = follow_up # Seconds after a bare wake word in which the next utterance is a command
+        self.onset_ms = onset_ms
+        self.hangover_ms = hangover_ms
+        self.preroll_ms = preroll_ms
+        self.max_utterance_s = max_utterance_s
+        self.energy_ratio = energy_ratio
+        self.min_energy = min_energy
+
+        self.recognizer = sr.Recognizer()
+        self.utterances = queue.Queue(maxsize=8)
+        self.commands = queue.Queue()
+        self.history = [] # (command, response) pairs for the UI
+        self.stop_event = None # One per run: threads of an earlier run see their own event, not a reset flag
+        self.threads = []
+        self.state = "stopped" # stopped | idle | speech | awake
+        self.awake_until = 0
+        self.noise_floor = None
+        self.stats = {"utterances": 0, "dropped": 0, "wake_hits": 0, "commands": 0}
+        self._wake_strip = re.compile(rf"^\W*(?:hey\s+|ok\s+)?{re.escape(self.wake_word)}\W*", re.I)
+
+    # --- LIFECYCLE ---
+    @property
+    def running(self):
+        return self.stop_event is not None and not self.stop_event.is_set()
+
+    def start(self):
+        if self.running: return "Voice service already running."
+        for t in self.threads: t.join(timeout=2) # Previous run releases the microphone first
+        stop = self.stop_event = threading.Event()
+        self.threads = [threading.Thread(target=loop, args=(stop,), name=name, daemon=True) for loop, name in
+                        [(self._capture_loop, "audio-capture"), (self._process_loop, "audio-process"), (self._command_loop, "audio-commands")]]
+        for t in self.threads: t.start()
+        return f"Always-on listening started. Say '{self.wake_word}'."
+
+    def stop(self):
+        if self.stop_event: self.stop_event.set()
+        self.state = "stopped"
+        return "Always-on listening stopped."
+
+    # --- VAD ---
+    @staticmethod
+    def _rms(chunk, width):
+        if width != 2 or not chunk: return 0
+        samples = array.array('h', chunk[:len(chunk) - len(chunk) % 2])
+        if not samples: return 0
+        return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+    def _capture_loop(self, stop):
+        try:
+            with sr.Microphone(chunk_size=1024) as source:
+                # Calibrate ONCE for the lifetime of the stream (listen_input used to pay this per command)
+                self.recognizer.adjust_for_ambient_noise(source, duration=1.0)
+                self.noise_floor = self.recognizer.energy_threshold / self.energy_ratio
+                chunk_ms = 1000.0 * source.CHUNK / source.SAMPLE_RATE
+                onset_frames = max(1, int(self.onset_ms / chunk_ms))
+                end_frames = max(1, int(self.hangover_ms / chunk_ms))
+                max_frames = int(self.max_utterance_s * 1000 / chunk_ms)
+                preroll = collections.deque(maxlen=max(1, int(self.preroll_ms / chunk_ms)))
+
+                voiced, in_speech, onset, silent = [], False, 0, 0
+                self.state = "idle"
+                while not stop.is_set():
+                    chunk = source.stream.read(source.CHUNK)
+                    energy = self._rms(chunk, source.SAMPLE_WIDTH)
+                    is_voice = energy > max(self.min_energy, self.noise_floor * self.energy_ratio)
+
+                    if not in_speech:
+                        preroll.append(chunk)
+                        if is_voice:
+                            onset += 1
+                        else:
+                            onset = 0
+                            self.noise_floor = 0.95 * self.noise_floor + 0.05 * energy
+                        if onset >= onset_frames:
+                            in_speech, voiced, silent = True, list(preroll), 0
+                            self.state = "speech"
+                        continue
+
+                    voiced.append(chunk)
+                    silent = 0 if is_voice else silent + 1
+                    if silent >= end_frames or len(voiced) >= max_frames:
+                        audio = sr.AudioData(b"".join(voiced), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+                        try:
+                            self.utterances.put_nowait(audio)
+                            self.stats["utterances"] += 1
+                        except queue.Full:
+                            self.stats["dropped"] += 1 # Recognition is behind; never block capture
+                        in_speech, voiced, onset = False, [], 0
+                        preroll.clear()
+                        self.state = "awake" if time.time() < self.awake_until else "idle"
+        except Exception as e:
+            print(f"Audio Service Error: {e}")
+        stop.set()
+        if self.stop_event is stop: self.state = "stopped"
+
+    # --- WAKE WORD + RECOGNITION ---
+    def _spot_wake_word(self, audio):
+        """Offline keyword spotting; falls back to a full transcription if pocketsphinx is missing."""
+        try:
+            hyp = self.recognizer.recognize_sphinx(audio, keyword_entries=[(self.wake_word, 1e-20)])
+            return self.wake_word in hyp.lower(), None
+        except sr.UnknownValueError:
+            return False, None
+        except Exception:
+            text = self.transcribe(audio)
+            return bool(self._wake_strip.match(text or "")), text
+
+    def _process_loop(self, stop):
+        while not stop.is_set():
+            try:
+                audio = self.utterances.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            text = None
+            if time.time() >= self.awake_until:
+                woke, text = self._spot_wake_word(audio)
+                if not woke: continue
+                self.stats["wake_hits"] += 1
+
+            text = text if text is not None else self.transcribe(audio)
+            command = self._wake_strip.sub("", text or "").strip()
+            if not command:
+                # Bare wake word: the next utterance is the command
+                self.awake_until = time.time() + self.follow_up
+                self.state = "awake"
+                continue
+            self.awake_until = 0
+            self.state = "idle"
+            self.stats["commands"] += 1
+            self.commands.put(command)
+
+    def _command_loop(self, stop):
+        while not stop.is_set():
+            try:
+                command = self.commands.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if self.on_command:
+                try:
+                    self.history.append((command, self.on_command(command)))
+                except Exception as e:
+                    print(f"Voice command error: {e}")
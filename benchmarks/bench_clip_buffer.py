@@ -0,0 +1,115 @@
+"""
+Benchmark: does the pre/post-event clip buffer cost detection fps?
+
+Runs the surveillance pipeline pieces (FrameRing -> MotionDetector, plus the
+ClipRecorder reader when enabled) on synthetic frames from a paced fake camera
+and reports analysed fps, analysis ms/frame, dropped frames, clip-buffer memory
+and the time to encode one clip in the background process.
+
+    python benchmarks/bench_clip_buffer.py --seconds 10 --fps 30 --width 1280 --height 720
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+import threading
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import cv2
+import numpy as np
+from frame_ring import FrameRing
+from motion_pipeline import MotionDetector
+from clip_recorder import ClipRecorder
+
+def synthetic_frames(width, height, count=90):
+    """Static noisy scene with a bright block crossing it (motion in the middle third)."""
+    rng = np.random.default_rng(0)
+    base = rng.integers(60, 120, (height, width, 3), dtype=np.uint8)
+    frames = []
+    for i in range(count):
+        f = base.copy()
+        if count // 3 <= i < 2 * count // 3:
+            x = int((i - count // 3) / (count / 3) * (width - width // 5))
+            cv2.rectangle(f, (x, height // 4), (x + width // 5, height * 3 // 4), (230, 230, 230), -1)
+        frames.append(f)
+    return frames
+
+def run_pipeline(frames, seconds, fps, clips):
+    ring, detector = FrameRing(4), MotionDetector(min_area=2000)
+    stats = {"captured": 0, "analyzed": 0, "dropped": 0, "analysis_s": 0.0}
+    running = [True]
+
+    def capture():
+        interval, next_due = 1.0 / fps, time.time()
+        while running[0]:
+            ring.commit(frames[stats["captured"] % len(frames)])
+            stats["captured"] += 1
+            next_due += interval
+            time.sleep(max(0, next_due - time.time()))
+
+    def analysis():
+        last_seq = -1
+        while running[0]:
+            with ring.latest(last_seq, timeout=0.5) as item:
+                if item is None: continue
+                seq, stamp, frame = item
+                if last_seq >= 0: stats["dropped"] += seq - last_seq - 1
+                last_seq = seq
+                t = time.perf_counter()
+                if detector.detect(frame) and clips: clips.trigger(stamp)
+                stats["analysis_s"] += time.perf_counter() - t
+                stats["analyzed"] += 1
+
+    threads = [threading.Thread(target=capture), threading.Thread(target=analysis)]
+    if clips: threads.append(threading.Thread(target=clips.run, args=(ring, lambda: running[0])))
+    for t in threads: t.start()
+    time.sleep(seconds)
+    peak_mb = clips.memory_mb() if clips else 0.0
+    running[0] = False
+    for t in threads: t.join()
+    return {
+        "analyzed_fps": round(stats["analyzed"] / seconds, 1),
+        "analysis_ms": round(stats["analysis_s"] / max(1, stats["analyzed"]) * 1000, 2),
+        "dropped": stats["dropped"],
+        "buffer_mb": peak_mb,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--fps", type=float, default=30, help="Fake camera frame rate")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--clip-fps", type=int, default=10)
+    parser.add_argument("--buffer-mb", type=int, default=64)
+    args = parser.parse_args()
+
+    frames = synthetic_frames(args.width, args.height)
+    out_dir = tempfile.mkdtemp(prefix="armor_clips_")
+    clips = None
+    try:
+        baseline = run_pipeline(frames, args.seconds, args.fps, None)
+        saved = []
+        clips = ClipRecorder(out_dir, fps=args.clip_fps, max_mb=args.buffer_mb,
+                             on_saved=lambda path, start: saved.append(path))
+        with_clips = run_pipeline(frames, args.seconds, args.fps, clips)
+        deadline = time.time() + 30
+        while clips.stats["clips"] + clips.stats["failed"] < 1 and time.time() < deadline:
+            time.sleep(0.1) # Let the encoder process finish the last clip
+
+        print(f"{'':<14}{'FPS':>8}{'MS/FRAME':>10}{'DROPPED':>9}{'BUFFER MB':>11}")
+        for name, r in [("baseline", baseline), ("clip buffer", with_clips)]:
+            print(f"{name:<14}{r['analyzed_fps']:>8}{r['analysis_ms']:>10}{r['dropped']:>9}{r['buffer_mb']:>11}")
+        print(f"\nClips written: {clips.stats['clips']} (failed {clips.stats['failed']}), "
+              f"last encode {clips.stats['encode_ms']} ms in the background process")
+        if saved: print(f"Example: {os.path.basename(saved[0])} ({os.path.getsize(saved[0]) // 1024} KB)")
+    finally:
+        if clips and clips.pool: clips.pool.shutdown()
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
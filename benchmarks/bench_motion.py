@@ -0,0 +1,184 @@
+"""
+Benchmark + regression check for motion detection, without a webcam.
+
+Runs the real per-camera pipeline (CameraPipeline: capture -> FrameRing ->
+adaptive idle/armed analysis) in-process on generated fixtures fed through
+capture_sources.FrameSource, and scores every analysed frame against the
+fixture's ground truth:
+
+    static   noisy still scene                     (any hit is a false positive)
+    flicker  same scene, global brightness swings  (any hit is a false positive)
+    small    small object crossing the frame       (hits expected while it moves)
+    large    person-sized object crossing          (hits expected while it moves)
+
+Reported per fixture / resolution / sensitivity: analysed fps, analysis CPU
+ms per frame (analysis thread only), process CPU % (includes generating the
+fixture), detection latency from motion onset (the scene is idle by then),
+and false positive / false negative frame counts. With --verify, hits are the
+frames the second stage confirmed (the fixtures' rectangles are not people, so
+expect misses there: it shows the stage's cost and how well it rejects).
+
+Every fixture row is checked against BOUNDS (moving objects smaller than the
+sensitivity must be missed instead); the script exits 1 if any row is out of
+bounds, so it can gate a change. --verify and --video rows are not checked.
+
+    python benchmarks/bench_motion.py
+    python benchmarks/bench_motion.py --resolutions 320x240,640x480,1280x720 --sensitivity 1000,5000
+    python benchmarks/bench_motion.py --fixtures small,large --fixed      # no idle mode
+    python benchmarks/bench_motion.py --fixtures flicker,large --verify hog
+    python benchmarks/bench_motion.py --video driveway.mp4                # fps / CPU only (no truth)
+"""
+import os
+import sys
+import math
+import time
+import queue
+import argparse
+import threading
+import multiprocessing as mp
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import cv2
+import numpy as np
+from capture_sources import FrameSource
+from camera_manager import CameraPipeline, make_shared
+
+FIXTURES = ["static", "flicker", "small", "large"]
+SIZES = {"small": (0.06, 0.12), "large": (0.2, 0.5)} # Moving object, fraction of frame width / height
+
+# Per fixture: max false positive / false negative frames and max detection latency (ms, idle at onset)
+BOUNDS = {
+    "static": {"fp": 0},
+    "flicker": {"fp": 2},
+    "small": {"fp": 0, "fn": 5, "latency": 1000},
+    "large": {"fp": 0, "fn": 5, "latency": 1000},
+}
+
+def fixture_frames(kind, width, height, fps, lead, motion, tail):
+    """Yields (frame, moving) for lead + motion + tail seconds; only small/large move (during motion)."""
+    rng = np.random.default_rng(0)
+    base = cv2.GaussianBlur(rng.integers(40, 160, (height, width, 3), dtype=np.uint8), (0, 0), 3)
+    noise = [rng.integers(0, 8, (height, width, 3), dtype=np.uint8) for _ in range(8)] # Sensor noise, cycled
+    size = SIZES.get(kind)
+    total = int((lead + motion + tail) * fps)
+    for i in range(total):
+        t = i / fps
+        frame = cv2.add(base, noise[i % len(noise)])
+        if kind == "flicker":
+            frame = cv2.convertScaleAbs(frame, alpha=1.0, beta=20 * math.sin(2 * math.pi * 0.5 * t))
+        moving = size is not None and lead <= t < lead + motion
+        if moving:
+            bw, bh = int(width * size[0]), int(height * size[1])
+            x = int((t - lead) / motion * (width - bw))
+            y = (height - bh) // 2
+            cv2.rectangle(frame, (x, y), (x + bw, y + bh), (225, 225, 225), -1)
+        yield frame, moving
+
+def settings_for(args):
+    return {
+        "analysis_width": args.analysis_width, "bg_method": args.method, "roi": None, "ignore": None,
+        "ring_slots": 4, "cooldown": 10, "preview_width": 640, "preview_fps": 15, "preview_quality": 70,
+        "adaptive": not args.fixed, "idle_fps": args.idle_fps, "idle_width": args.idle_width,
+        "armed_fps": args.armed_fps, "quiet_s": args.quiet, "scene_change": 12.0,
+        "verify": args.verify, "verify_model": args.verify_model, "verify_score": 0.5, "verify_fps": 4, "verify_hold_s": 3,
+        "clips": False, "capture_dir": None,
+    }
+
+def run_source(source, settings, sensitivity):
+    """Runs one CameraPipeline until the source ends. Returns [(stamp, seen_at, hit, thread_cpu)], wall s, cpu s."""
+    ctx = mp.get_context("spawn")
+    shared = make_shared(ctx, settings["preview_width"], ctx.Value('i', sensitivity, lock=False))
+    pipeline = CameraPipeline(0, {"source": source}, settings, {k: v for k, v in shared.items() if k != "shm"},
+                              queue.Queue(), threading.Event())
+    results = []
+    pipeline.on_analyzed = lambda stamp, boxes: results.append((stamp, time.time(), bool(boxes), time.thread_time()))
+    wall, cpu = time.time(), time.process_time()
+    try:
+        pipeline.run()
+    finally:
+        shared["shm"].close()
+        shared["shm"].unlink()
+    return results, time.time() - wall, time.process_time() - cpu
+
+def score(results, source, wall, cpu, warmup):
+    row = {"fps": round(len(results) / wall, 1), "cpu_ms": "-", "proc_cpu": round(cpu / wall * 100, 1),
+           "latency": "-", "fp": 0, "fn": 0, "frames": len(results)}
+    if len(results) > 1:
+        row["cpu_ms"] = round((results[-1][3] - results[0][3]) / (len(results) - 1) * 1000, 2)
+    start = results[0][0] + warmup if results else 0
+    for stamp, _, hit, _ in results:
+        truth = source.truth_at(stamp)
+        if stamp < start or truth is None: continue
+        row["fp"] += hit and not truth
+        row["fn"] += truth and not hit
+    onset = source.first_delivery(lambda truth: truth)
+    if onset:
+        seen = next((seen_at for stamp, seen_at, hit, _ in results if hit and stamp >= onset), None)
+        row["latency"] = round((seen - onset) * 1000) if seen else "missed"
+    return row
+
+def check(kind, res, sensitivity, row):
+    """[] if the row is within its fixture's bounds, else what broke them."""
+    bounds, failed = BOUNDS[kind], []
+    if kind in SIZES and res[0] * SIZES[kind][0] * res[1] * SIZES[kind][1] < sensitivity:
+        # Smaller than the minimum motion area: seeing it at all is the regression
+        return [] if row["latency"] == "missed" else [f"seen below sensitivity ({row['latency']} ms)"]
+    for key in ("fp", "fn"):
+        if key in bounds and row[key] > bounds[key]: failed.append(f"{key} {row[key]} > {bounds[key]}")
+    if "latency" in bounds:
+        if row["latency"] == "missed": failed.append("missed")
+        elif row["latency"] > bounds["latency"]: failed.append(f"latency {row['latency']} > {bounds['latency']}")
+    return failed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=",".join(FIXTURES))
+    parser.add_argument("--resolutions", default="640x480", help="Comma-separated WxH list")
+    parser.add_argument("--sensitivity", default="1000,5000", help="Comma-separated min motion areas (full-res px)")
+    parser.add_argument("--fps", type=float, default=30, help="Fake camera frame rate")
+    parser.add_argument("--lead", type=float, default=6, help="Quiet seconds before motion (scene goes idle)")
+    parser.add_argument("--motion", type=float, default=3, help="Seconds the object is moving")
+    parser.add_argument("--tail", type=float, default=3)
+    parser.add_argument("--warmup", type=float, default=2, help="Seconds not scored while the background model learns")
+    parser.add_argument("--method", default="mog2", choices=["mog2", "knn", "diff"])
+    parser.add_argument("--analysis-width", type=int, default=320)
+    parser.add_argument("--idle-width", type=int, default=160)
+    parser.add_argument("--idle-fps", type=float, default=2)
+    parser.add_argument("--armed-fps", type=float, default=15)
+    parser.add_argument("--quiet", type=float, default=3, help="Seconds without motion before dropping to idle")
+    parser.add_argument("--fixed", action="store_true", help="Disable the idle mode (fixed armed rate)")
+    parser.add_argument("--verify", choices=["hog", "dnn"], help="Second stage inside motion boxes (scored: verified hits)")
+    parser.add_argument("--verify-model", help="Model file for --verify dnn")
+    parser.add_argument("--video", help="Also run this video file (paced at its own fps; no ground truth)")
+    args = parser.parse_args()
+
+    settings = settings_for(args)
+    resolutions = [tuple(int(v) for v in r.split("x")) for r in args.resolutions.split(",")]
+    sensitivities = [int(s) for s in args.sensitivity.split(",")]
+    runs = [(kind, res) for kind in args.fixtures.split(",") for res in resolutions]
+    if args.video: runs.append(("video", None))
+
+    failures = 0
+    print(f"{'FIXTURE':<9}{'RES':>11}{'SENS':>7}{'FPS':>7}{'CPU MS/FR':>11}{'PROC CPU%':>11}{'LATENCY MS':>12}{'FP':>5}{'FN':>5}{'FRAMES':>8}  CHECK")
+    for kind, res in runs:
+        for sensitivity in sensitivities:
+            if kind == "video":
+                source = FrameSource.from_video(args.video)
+                label = "file"
+            else:
+                source = FrameSource(fixture_frames(kind, res[0], res[1], args.fps, args.lead, args.motion, args.tail), args.fps)
+                label = f"{res[0]}x{res[1]}"
+            results, wall, cpu = run_source(source, settings, sensitivity)
+            r = score(results, source, wall, cpu, args.warmup)
+            failed = [] if kind == "video" or args.verify else check(kind, res, sensitivity, r)
+            failures += bool(failed)
+            status = "-" if kind == "video" or args.verify else "; ".join(failed) or "ok"
+            print(f"{kind:<9}{label:>11}{sensitivity:>7}{r['fps']:>7}{r['cpu_ms']:>11}{r['proc_cpu']:>11}"
+                  f"{r['latency']:>12}{r['fp']:>5}{r['fn']:>5}{r['frames']:>8}  {status}")
+    if failures: print(f"\n{failures} run(s) out of bounds")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+Offline benchmark for the command-parsing pipeline.
+
+Replays benchmarks/commands.jsonl through every parse_* method, processcommand
+and the Command Center dispatcher against a stub Ollama server, and reports
+p50/p95/p99 latency, LLM calls per command and parse-failure rate per module.
+
+    python benchmarks/bench_parsing.py --latency 1.0 --per-token 0.01
+    python benchmarks/bench_parsing.py --cache --repeat 3 --json results.json
+
+Modules whose dependencies are not installed are skipped with a note.
+"""
+import os
+import sys
+import json
+import math
+import time
+import types
+import tempfile
+import argparse
+import webbrowser
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+from stub_ollama import StubOllama, load_rules
+
+def install_config(stub_url, tmp_dir):
+    """Points the app at the stub. Uses config.py when present, otherwise a minimal stand-in (CI)."""
+    try:
+        import config
+    except ImportError:
+        config = types.ModuleType("config")
+        config.EMAIL_SENDER_ADDRESS = ""
+        config.EMAIL_APP_PASSWORD = ""
+        config.SMTP_SERVER, config.SMTP_PORT, config.IMAP_SERVER = "localhost", 465, "localhost"
+        config.CONTACTS_FILE = os.path.join(ROOT, "contacts.json")
+        config.REMINDERS_DB = os.path.join(tmp_dir, "reminders.json")
+        config.SHOPPING_DB = os.path.join(tmp_dir, "shopping_list.json")
+        config.TODO_DB = os.path.join(tmp_dir, "todo_list.json")
+        config.SCHEDULED_DB = os.path.join(tmp_dir, "scheduled.json")
+        config.SECURITY_LOG_DB = os.path.join(tmp_dir, "security_log.json")
+        config.SECURITY_CAPTURES_DIR = os.path.join(tmp_dir, "security_captures")
+        sys.modules["config"] = config
+    config.OLLAMA_HOST = stub_url
+    config.LLM_CACHE_DB = os.path.join(tmp_dir, "llm_cache.db")
+    config.TELEGRAM_BOT_TOKEN = "" # Never start polling from a benchmark
+    return config
+
+def build_targets():
+    """module name -> (callable, failure predicate). Missing dependencies skip the module."""
+    targets = {}
+    os.chdir(ROOT) # apps_config.json and friends are resolved relative to the repo
+    webbrowser.open = lambda *a, **k: True # processcommand must not launch a browser
+
+    bots = {}
+    def add(name, factory):
+        try:
+            bots[name] = factory()
+        except Exception as e:
+            print(f"[skip] {name}: {e}")
+
+    def desktop():
+        from desktop_module import DesktopAssistant
+        return DesktopAssistant()
+    def reminders():
+        from reminders_module import RemindersAssistant
+        return RemindersAssistant()
+    def messaging():
+        from messaging_module import MessagingAssistant
+        return MessagingAssistant()
+    def email_bot():
+        from email_module import EmailAssistant
+        return EmailAssistant()
+    def security():
+        from security_module import SecuritySystem
+        return SecuritySystem()
+
+    for name, factory in [("desktop", desktop), ("reminders", reminders), ("messaging", messaging),
+                          ("email", email_bot), ("security", security)]:
+        add(name, factory)
+
+    is_none = lambda r: r is None
+    if "desktop" in bots: targets["desktop"] = (bots["desktop"].parse_desktop_command, is_none)
+    if "reminders" in bots: targets["reminders"] = (bots["reminders"].parse_command, is_none)
+    if "messaging" in bots:
+        targets["messaging"] = (bots["messaging"].parse_command, is_none)
+        targets["sentiment"] = (bots["messaging"].analyze_sentiment, lambda r: r.get("emotion") == "unknown")
+    if "email" in bots: targets["email"] = (bots["email"].parse_voice_command, is_none)
+    if "security" in bots: targets["security"] = (bots["security"].parse_security_command, is_none)
+
+    try:
+        import Project_core
+        from tts_service import tts
+        tts.muted = True # No audio during benchmarks
+        targets["core"] = (Project_core.processcommand, lambda r: str(r).startswith("AI Error"))
+        from command_dispatcher import CommandDispatcher
+        dispatcher = CommandDispatcher(bots.get("security"), bots.get("desktop"), bots.get("reminders"),
+                                       bots.get("messaging"), bots.get("email"))
+        targets["dispatch"] = (dispatcher.classify, lambda r: r.get("module") == "chat" and not r.get("reply"))
+    except Exception as e:
+        print(f"[skip] core/dispatch: {e}")
+    return targets
+
+def percentile(values, p):
+    if not values: return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+def run(corpus, targets, stub, repeat=1):
+    # One untimed call per module so lazy imports (dateparser locales, HTTP pool) are not measured
+    for func, _ in targets.values():
+        try: func("warm up")
+        except Exception: pass
+    results = {}
+    for _ in range(repeat):
+        for cmd in corpus:
+            target = targets.get(cmd["module"])
+            if not target: continue
+            func, failed = target
+            r = results.setdefault(cmd["module"], {"latencies": [], "llm_calls": 0, "failures": 0})
+            calls_before = stub.calls
+            start = time.perf_counter()
+            try:
+                out = func(cmd["text"])
+                bad = failed(out)
+            except Exception as e:
+                print(f"[error] {cmd['module']}: {cmd['text']!r}: {e}")
+                bad = True
+            r["latencies"].append((time.perf_counter() - start) * 1000)
+            r["llm_calls"] += stub.calls - calls_before
+            r["failures"] += int(bad)
+    return results
+
+def summarize(results):
+    rows = []
+    for module, r in results.items():
+        n = len(r["latencies"])
+        rows.append({
+            "module": module, "n": n,
+            "p50_ms": round(percentile(r["latencies"], 50), 1),
+            "p95_ms": round(percentile(r["latencies"], 95), 1),
+            "p99_ms": round(percentile(r["latencies"], 99), 1),
+            "llm_calls_per_cmd": round(r["llm_calls"] / n, 2),
+            "failure_rate": round(r["failures"] / n, 3),
+        })
+    return rows
+
+def print_table(rows):
+    header = f"{'MODULE':<11}{'N':>5}{'P50 ms':>10}{'P95 ms':>10}{'P99 ms':>10}{'LLM/CMD':>9}{'FAIL %':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(f"{r['module']:<11}{r['n']:>5}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+              f"{r['llm_calls_per_cmd']:>9}{r['failure_rate'] * 100:>7.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=os.path.join(HERE, "commands.jsonl"))
+    parser.add_argument("--responses", default=os.path.join(HERE, "canned_responses.json"))
+    parser.add_argument("--latency", type=float, default=0.5, help="Stub seconds before first token")
+    parser.add_argument("--per-token", type=float, default=0.005, help="Stub seconds per output token")
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the corpus")
+    parser.add_argument("--cache", action="store_true", help="Keep the LLM response cache enabled")
+    parser.add_argument("--modules", default=None, help="Comma-separated subset of modules")
+    parser.add_argument("--json", default=None, help="Also write results to this file")
+    args = parser.parse_args()
+
+    with open(args.corpus, 'r', encoding='utf-8') as f:
+        corpus = [json.loads(line) for line in f if line.strip()]
+    if args.modules:
+        wanted = set(args.modules.split(","))
+        corpus = [c for c in corpus if c["module"] in wanted]
+
+    stub = StubOllama(load_rules(args.responses), args.latency, args.per_token).start()
+    tmp_dir = tempfile.mkdtemp(prefix="armor_bench_")
+    install_config(stub.url, tmp_dir)
+
+    import llm_cache
+    if not args.cache:
+        llm_cache.cache.ttls = {} # Every call reaches the (stub) model
+
+    targets = build_targets()
+    results = run(corpus, targets, stub, args.repeat)
+    rows = summarize(results)
+    print_table(rows)
+    if args.cache:
+        print(f"\nCache: {llm_cache.cache.stats()}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"settings": vars(args), "results": rows}, f, indent=4)
+    stub.stop()
+
+if __name__ == "__main__":
+    main()
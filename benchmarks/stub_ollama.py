@@ -0,0 +1,134 @@
+"""
+Stand-in for the Ollama HTTP API (/api/chat, /api/generate, /api/ps) so the
+command pipeline can be benchmarked without a model.
+
+Responses are picked from canned rules ({"match": regex, "response": text})
+applied to the last message; latency = base + per_token * output tokens.
+
+Run standalone:  python benchmarks/stub_ollama.py --port 11435 --latency 1.5
+"""
+import re
+import json
+import time
+import argparse
+import threading
+import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubOllama:
+    def __init__(self, rules=None, latency=1.0, per_token=0.0, default="OK.", host="127.0.0.1", port=0):
+        self.rules = [(re.compile(r['match'], re.I | re.S), r['response']) for r in (rules or [])]
+        self.latency = latency
+        self.per_token = per_token
+        self.default = default
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reply_for(self, prompt):
+        for pattern, response in self.rules:
+            if pattern.search(prompt):
+                return response
+        return self.default
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, payload, status=200):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == "/api/ps":
+                    self._send({"models": []})
+                elif self.path == "/api/version":
+                    self._send({"version": "stub"})
+                else:
+                    self._send({"error": "not found"}, 404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                req = json.loads(self.rfile.read(length) or b"{}")
+                model = req.get("model", "")
+                now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+                if self.path == "/api/generate":
+                    # Warm-up calls: answer immediately, they are not inferences
+                    self._send({"model": model, "created_at": now, "response": "", "done": True})
+                    return
+                if self.path != "/api/chat":
+                    self._send({"error": "not found"}, 404)
+                    return
+
+                with stub.calls_lock: stub.calls += 1
+                messages = req.get("messages") or [{}]
+                text = stub.reply_for(messages[-1].get("content", ""))
+                tokens = re.findall(r"\S+\s*", text) or [text]
+                time.sleep(stub.latency)
+
+                if not req.get("stream", True):
+                    time.sleep(stub.per_token * len(tokens))
+                    self._send({"model": model, "created_at": now, "done": True, "done_reason": "stop",
+                                "message": {"role": "assistant", "content": text}})
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for tok in tokens:
+                    time.sleep(stub.per_token)
+                    self._chunk({"model": model, "created_at": now, "done": False,
+                                 "message": {"role": "assistant", "content": tok}})
+                self._chunk({"model": model, "created_at": now, "done": True, "done_reason": "stop",
+                             "message": {"role": "assistant", "content": ""}})
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _chunk(self, payload):
+                line = (json.dumps(payload) + "\n").encode('utf-8')
+                self.wfile.write(f"{len(line):X}\r\n".encode() + line + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+def load_rules(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Ollama server with canned responses.")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=1.0, help="Seconds before the first token")
+    parser.add_argument("--per-token", type=float, default=0.0, help="Seconds per output token")
+    parser.add_argument("--responses", default=None, help="JSON file with canned {match, response} rules")
+    args = parser.parse_args()
+    stub = StubOllama(load_rules(args.responses) if args.responses else None,
+                      args.latency, args.per_token, port=args.port)
+    print(f"Stub Ollama listening on {stub.url}")
+    stub.server.serve_forever()
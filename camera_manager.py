@@ -0,0 +1,370 @@
+import time
+import queue
+import threading
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import cv2
+import numpy as np
+from motion_pipeline import MotionDetector, draw_boxes
+from frame_ring import FrameRing
+from clip_recorder import ClipRecorder
+from adaptive_rate import AdaptiveRate, IDLE, ARMED
+from capture_sources import open_capture
+from object_verifier import make_verifier
+
+# Per-camera counters in shared memory (parent reads them without IPC round-trips)
+(CAPTURED, ANALYZED, DROPPED, ANALYSIS_MS, MODE, IDLE_CPU, ARMED_CPU, ESCALATIONS,
+ MOTION_HITS, VERIFY_CALLS, VERIFY_HITS, VERIFY_MS) = range(12)
+N_COUNTERS = 12
+
+def normalize_cameras(cameras):
+    """Config entries may be a device index, a stream URL, a video path, a capture factory
+    (see capture_sources.open_capture) or a dict with source/name/roi/ignore."""
+    out = []
+    for i, cam in enumerate(cameras):
+        cam = dict(cam) if isinstance(cam, dict) else {"source": cam}
+        cam.setdefault("name", f"Camera {i + 1}")
+        out.append(cam)
+    return out
+
+# --- CHILD PROCESS ---
+class CameraPipeline:
+    """
+    Capture -> FrameRing -> analysis (+ clip reader) for ONE camera, inside its own worker process.
+    Talks to the parent only through shared memory (preview frame, counters, sensitivity)
+    and a compact event queue (JPEG evidence, finished clips).
+    """
+
+    def __init__(self, cam_id, cam, settings, shared, events, stop):
+        self.cam_id = cam_id
+        self.source = cam["source"]
+        self.settings = settings
+        self.events = events
+        self.stop = stop
+        self.sensitivity = shared["sensitivity"]
+        self.counters = shared["counters"]
+        self.preview_seq = shared["seq"]
+        self.preview_size = shared["size"]
+        self.preview_lock = shared["lock"]
+        self.shm = shared_memory.SharedMemory(name=shared["shm_name"])
+        self.preview_max = settings["preview_width"]
+
+        self.ring = FrameRing(settings["ring_slots"])
+        self.rate = AdaptiveRate(settings["idle_fps"], settings["armed_fps"], settings["quiet_s"],
+                                 settings["scene_change"], enabled=settings["adaptive"])
+        zones = {"roi": cam.get("roi", settings["roi"]), "ignore": cam.get("ignore", settings["ignore"])}
+        # Idle detector runs on every analysed frame (cheap, keeps its background current);
+        # the full-width one only while armed, bridged by the idle one until it has warmed up
+        adaptive_width = settings["adaptive"] and settings["idle_width"] < settings["analysis_width"]
+        self.detector = MotionDetector(analysis_width=settings["idle_width"] if adaptive_width else settings["analysis_width"],
+                                       method=settings["bg_method"], **zones)
+        self.armed_detector = MotionDetector(analysis_width=settings["analysis_width"], method=settings["bg_method"],
+                                             warmup_frames=10, **zones) if adaptive_width else None
+        self.clips = None
+        if settings["clips"]:
+            # Encoder runs on a thread here: this process is already off the UI interpreter
+            self.clips = ClipRecorder(settings["capture_dir"], pre_s=settings["clip_pre_s"], post_s=settings["clip_post_s"],
+                                      fps=settings["clip_fps"], max_mb=settings["clip_buffer_mb"],
+                                      prefix=f"clip_cam{cam_id}", executor="thread",
+                                      on_saved=lambda path, start: self._emit(("clip", self.cam_id, path, start)))
+        # Optional second stage (person / object detector) run only inside motion boxes
+        self.verifier = make_verifier(settings)
+        self.verified_at = 0
+        self.rejected_at = 0
+        self.alert_cooldown = 0
+        self.last_preview = 0
+        self.on_analyzed = None # on_analyzed(stamp, boxes) per analysed frame, when run in-process (benchmarks)
+
+    def active(self):
+        return not self.stop.is_set()
+
+    def _emit(self, msg):
+        try:
+            self.events.put_nowait(msg)
+        except queue.Full:
+            pass # Parent is behind; evidence is best-effort, detection must not wait
+
+    def run(self):
+        threads = [threading.Thread(target=self._capture_loop, daemon=True),
+                   threading.Thread(target=self._analysis_loop, daemon=True)]
+        if self.clips:
+            threads.append(threading.Thread(target=self.clips.run, args=(self.ring, self.active), daemon=True))
+        for t in threads: t.start()
+        threads[0].join() # Capture ends on stop or when the camera goes away
+        self.stop.set()
+        for t in threads[1:]: t.join(timeout=5)
+        if self.clips and self.clips.pool: self.clips.pool.shutdown(wait=True) # Report the last clip before "exit"
+        self.shm.close()
+
+    def _capture_loop(self):
+        """Decodes only as many frames as the current mode analyses; the others are grabbed and discarded."""
+        cap = open_capture(self.source)
+        if not cap.isOpened(): self._emit(("error", self.cam_id, f"Cannot open camera {self.source!r}", None))
+        next_decode = 0
+        while self.active() and cap.isOpened():
+            now = time.time()
+            if now < next_decode:
+                if not cap.grab(): break # Keeps the driver queue drained (no stale frames on escalation), skips decoding
+                continue
+            next_decode = now + self.rate.interval * 0.9 # Slightly early, so analysis never waits a whole frame
+            slot = self.ring.writable()
+            ret, frame = cap.read(slot) if slot is not None else cap.read()
+            if not ret: break
+            self.ring.commit(frame)
+            self.counters[CAPTURED] += 1
+        cap.release()
+
+    def _analysis_loop(self):
+        """Always analyses the newest frame; frames captured in the meantime are dropped (and counted)."""
+        last_seq, last_boxes, last_hit = -1, [], 0
+        next_due = time.time()
+        while self.active():
+            with self.ring.latest(last_seq, timeout=0.5) as item:
+                if item is None: continue
+                seq, stamp, frame = item
+                if last_seq >= 0: self.counters[DROPPED] += seq - last_seq - 1
+                last_seq = seq
+                motion = self._detect(frame)
+                self.counters[ANALYZED] += 1
+                changed = self.rate.scene_changed(frame) # Every frame: the reference must not lag behind a motion spell
+                escalated = self.rate.update(bool(motion) or changed) and self.rate.mode == ARMED
+                if escalated and self.armed_detector: self.armed_detector.reset() # Background is stale since the last armed spell
+                boxes = self._verify(frame, motion)
+                self._report()
+                if self.on_analyzed: self.on_analyzed(stamp, boxes)
+                if boxes:
+                    last_boxes, last_hit = boxes, time.time()
+                    if self.clips: self.clips.trigger(stamp) # Every hit extends the post-roll
+                    if time.time() - self.alert_cooldown > self.settings["cooldown"]:
+                        self.alert_cooldown = time.time()
+                        ok, jpeg = cv2.imencode(".jpg", draw_boxes(frame.copy(), boxes))
+                        if ok: self._emit(("motion", self.cam_id, stamp, jpeg.tobytes()))
+                self._publish_preview(frame, last_boxes if time.time() - last_hit < 1.0 else [])
+            next_due += self.rate.interval
+            time.sleep(max(0, next_due - time.time()))
+            next_due = max(next_due, time.time())
+
+    def _detect(self, frame):
+        for d in (self.detector, self.armed_detector):
+            if d: d.min_area = self.sensitivity.value
+        boxes = self.detector.detect(frame)
+        ms = self.detector.timing["avg_ms"]
+        if self.armed_detector and self.rate.mode == ARMED:
+            armed = self.armed_detector.detect(frame)
+            ms += self.armed_detector.timing["avg_ms"]
+            if self.armed_detector.frames_seen > self.armed_detector.warmup_frames: boxes = armed
+        self.counters[ANALYSIS_MS] = ms
+        if boxes: self.counters[MOTION_HITS] += 1
+        return boxes
+
+    def _verify(self, frame, boxes):
+        """
+        Second stage: motion only counts (alert, clip) once the verifier sees an object inside a motion box.
+        A confirmation holds for verify_hold_s; after a rejection it waits 1/verify_fps before trying again.
+        """
+        if not boxes or not self.verifier: return boxes
+        now = time.time()
+        if now - self.verified_at < self.settings["verify_hold_s"]: return boxes
+        if now - self.rejected_at < 1.0 / self.settings["verify_fps"]: return []
+        confirmed = self.verifier.verify(frame, boxes)
+        if confirmed: self.verified_at = now
+        else: self.rejected_at = now
+        timing = self.verifier.timing
+        self.counters[VERIFY_CALLS], self.counters[VERIFY_HITS], self.counters[VERIFY_MS] = timing["calls"], timing["hits"], timing["avg_ms"]
+        return confirmed
+
+    def _report(self):
+        self.counters[MODE] = 1 if self.rate.mode == ARMED else 0
+        self.counters[IDLE_CPU] = self.rate.cpu_percent(IDLE)
+        self.counters[ARMED_CPU] = self.rate.cpu_percent(ARMED)
+        self.counters[ESCALATIONS] = self.rate.escalations
+
+    def _publish_preview(self, frame, boxes):
+        """Downscaled JPEG preview into shared memory, at most preview_fps times a second (encoded once, here)."""
+        now = time.time()
+        if now - self.last_preview < 1.0 / self.settings["preview_fps"]: return
+        self.last_preview = now
+        h, w = frame.shape[:2]
+        scale = min(1.0, self.preview_max / float(w))
+        small = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA) if scale < 1 else frame
+        if boxes:
+            small = draw_boxes(small.copy() if small is frame else small,
+                               [tuple(int(v * scale) for v in b) for b in boxes])
+        ok, jpeg = cv2.imencode(".jpg", small, [cv2.IMWRITE_JPEG_QUALITY, self.settings["preview_quality"]])
+        if not ok or jpeg.size > self.shm.size: return
+        with self.preview_lock:
+            self.shm.buf[:jpeg.size] = jpeg.tobytes()
+            self.preview_size.value = jpeg.size
+            self.preview_seq.value += 1
+
+def camera_process(cam_id, cam, settings, shared, events, stop):
+    """Worker process entry point."""
+    try:
+        CameraPipeline(cam_id, cam, settings, shared, events, stop).run()
+    except Exception as e:
+        events.put(("error", cam_id, str(e), None))
+    events.put(("exit", cam_id, None, None))
+
+def make_shared(ctx, preview_width, sensitivity):
+    """Shared-memory state of one camera: preview JPEG + counters (+ the sensitivity Value all cameras share)."""
+    shm = shared_memory.SharedMemory(create=True, size=preview_width * preview_width * 3) # A raw square preview always fits the JPEG
+    return {
+        "shm": shm, "shm_name": shm.name, "lock": ctx.Lock(),
+        "seq": ctx.Value('q', 0, lock=False), "size": ctx.Value('i', 0, lock=False),
+        "counters": ctx.Array('d', N_COUNTERS, lock=False), "sensitivity": sensitivity,
+    }
+
+# --- PARENT ---
+class CameraManager:
+    """
+    Runs every configured camera in its own process (capture + detection scale with cores,
+    not with the GIL). The parent only copies JPEG previews out of shared memory and
+    receives compact motion / clip events, which it hands to on_event(kind, cam_id, a, b).
+    """
+
+    def __init__(self, cameras, settings, on_event=None, sensitivity=5000):
+        self.cameras = normalize_cameras(cameras)
+        self.settings = settings
+        self.on_event = on_event
+        self.ctx = mp.get_context("spawn") # Never fork a process that is running Streamlit's threads
+        self.sensitivity = self.ctx.Value('i', sensitivity, lock=False)
+        self.events = None
+        self.stop_event = None
+        self.procs = {}
+        self.shared = {}
+        self.previews = {} # cam_id -> (seq, jpeg bytes)
+        self.decoded = {} # cam_id -> (seq, rgb), only for callers that want arrays
+        self.preview_lock = threading.Lock() # Stream viewers read previews from server threads
+        self.alive = set()
+        self.stopped_procs = [] # Previous runs' processes, possibly still finishing a clip
+
+    @property
+    def running(self):
+        return bool(self.alive)
+
+    @property
+    def stopping(self):
+        """A stopped run is still winding down (its processes hold the capture devices)."""
+        self.stopped_procs = [p for p in self.stopped_procs if p.is_alive()]
+        return bool(self.stopped_procs)
+
+    def start(self):
+        """False if a stopped run has not let go of the cameras yet (try again shortly)."""
+        if self.running: return True
+        if self.stopping: return False
+        self.events = self.ctx.Queue(maxsize=64)
+        self.stop_event = self.ctx.Event()
+        for cam_id, cam in enumerate(self.cameras):
+            self.shared[cam_id] = make_shared(self.ctx, self.settings["preview_width"], self.sensitivity)
+            child_shared = {k: v for k, v in self.shared[cam_id].items() if k != "shm"}
+            p = self.ctx.Process(target=camera_process, name=f"camera-{cam_id}", daemon=True,
+                                 args=(cam_id, cam, self.settings, child_shared, self.events, self.stop_event))
+            p.start()
+            self.procs[cam_id] = p
+            self.alive.add(cam_id)
+            self.previews[cam_id] = (0, None)
+            self.decoded.pop(cam_id, None)
+        threading.Thread(target=self._event_loop, args=(self.events, self.procs), name="camera-events", daemon=True).start()
+        return True
+
+    def stop(self, timeout=None):
+        """
+        Signals every camera and returns at once (called from the UI thread). A background reaper gives
+        them one shared deadline to finish, long enough for a clip encode to drain, before terminating.
+        """
+        if self.stop_event: self.stop_event.set()
+        timeout = timeout or self.settings.get("stop_timeout", 30 if self.settings.get("clips") else 5)
+        if self.procs:
+            self.stopped_procs += self.procs.values()
+            threading.Thread(target=self._reap, args=(self.procs, time.time() + timeout), name="camera-reaper", daemon=True).start()
+        with self.preview_lock: # Stream threads may be copying out of a segment right now
+            self.alive.clear()
+            for s in self.shared.values():
+                s["shm"].close()
+                try: s["shm"].unlink()
+                except FileNotFoundError: pass
+            self.procs, self.shared = {}, {}
+
+    def _reap(self, procs, deadline):
+        for p in procs.values(): p.join(max(0, deadline - time.time()))
+        for p in procs.values():
+            if p.is_alive():
+                print(f"Camera Error: {p.name} did not stop in time, terminating")
+                p.terminate()
+
+    def _event_loop(self, events, procs):
+        """
+        One per run; lives until that run's processes are gone, so clips finished while stopping still
+        arrive. Once the run is stopped only "clip" / "exit" are passed on (no alerts after deactivation).
+        """
+        while True:
+            try:
+                kind, cam_id, a, b = events.get(timeout=0.5)
+            except queue.Empty:
+                if not any(p.is_alive() for p in procs.values()): break
+                if procs is self.procs:
+                    for cam_id in [c for c in self.alive if not procs[c].is_alive()]:
+                        # Crashed before it could say goodbye
+                        self.alive.discard(cam_id)
+                        if self.on_event: self.on_event("exit", cam_id, None, None)
+                continue
+            except (EOFError, OSError):
+                break
+            if kind == "exit" and procs is self.procs: self.alive.discard(cam_id)
+            if kind == "error": print(f"Camera Error ({self.name(cam_id)}): {a}")
+            if procs is not self.procs and kind not in ("clip", "exit"): continue
+            if self.on_event:
+                try:
+                    self.on_event(kind, cam_id, a, b)
+                except Exception as e:
+                    print(f"Camera Event Error: {e}")
+
+    # --- UI ACCESS ---
+    def name(self, cam_id):
+        return self.cameras[cam_id]["name"]
+
+    def latest_jpeg(self, cam_id=0):
+        """(seq, JPEG bytes) of a camera's newest preview, copied out of shared memory once per new frame
+        however many viewers ask. (seq, None) before the first frame, None when the camera is not running."""
+        with self.preview_lock:
+            shared = self.shared.get(cam_id)
+            if not shared or cam_id not in self.alive: return None # Stopped: segments are closed
+            seq, data = self.previews.get(cam_id, (0, None))
+            if shared["seq"].value != seq:
+                with shared["lock"]:
+                    data = bytes(shared["shm"].buf[:shared["size"].value])
+                    seq = shared["seq"].value
+                self.previews[cam_id] = (seq, data)
+            return seq, data
+
+    def latest_frame(self, cam_id=0):
+        """Latest preview as an RGB array (decoded once per new frame)."""
+        latest = self.latest_jpeg(cam_id)
+        if not latest or latest[1] is None: return None
+        seq, frame = self.decoded.get(cam_id, (0, None))
+        if seq != latest[0]:
+            frame = cv2.cvtColor(cv2.imdecode(np.frombuffer(latest[1], np.uint8), cv2.IMREAD_COLOR), cv2.COLOR_BGR2RGB)
+            self.decoded[cam_id] = (latest[0], frame)
+        return frame
+
+    def stats(self, cam_id=None):
+        """Counters of one camera, or summed over all cameras (CPU: percent of a core per mode; ms: mean per camera)."""
+        ids = [cam_id] if cam_id is not None else list(self.shared)
+        total = {"captured": 0, "analyzed": 0, "dropped": 0, "armed": 0, "idle_cpu": 0.0, "armed_cpu": 0.0, "escalations": 0,
+                 "motion_ms": 0.0, "motion_hits": 0, "verify_ms": 0.0, "verify_calls": 0, "verify_hits": 0}
+        for i in ids:
+            c = self.shared[i]["counters"] if i in self.shared else [0] * N_COUNTERS
+            total["captured"] += int(c[CAPTURED])
+            total["analyzed"] += int(c[ANALYZED])
+            total["dropped"] += int(c[DROPPED])
+            total["armed"] += int(c[MODE])
+            total["idle_cpu"] = round(total["idle_cpu"] + c[IDLE_CPU], 1)
+            total["armed_cpu"] = round(total["armed_cpu"] + c[ARMED_CPU], 1)
+            total["escalations"] += int(c[ESCALATIONS])
+            total["motion_ms"] += c[ANALYSIS_MS] / max(1, len(ids))
+            total["motion_hits"] += int(c[MOTION_HITS])
+            total["verify_ms"] += c[VERIFY_MS] / max(1, len(ids))
+            total["verify_calls"] += int(c[VERIFY_CALLS])
+            total["verify_hits"] += int(c[VERIFY_HITS])
+        total["motion_ms"], total["verify_ms"] = round(total["motion_ms"], 1), round(total["verify_ms"], 1)
+        return total
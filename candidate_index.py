@@ -0,0 +1,105 @@
+import re
+import difflib
+
+# Keeps LLM prompts a constant size: instead of embedding every contact/app,
+# only the k entries that best match the spoken command are listed.
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+# Command words that would otherwise collide phonetically with names ("send" ~ "smith")
+_STOPWORDS = set("""
+a an the to for of on at in by and or with about regarding saying says that this is it my me you your
+please send write email mail message text tell ask whatsapp telegram schedule tomorrow today tonight
+open close launch start run quit exit kill app application
+""".split())
+_SOUNDEX = str.maketrans("bfpvcgjkqsxzdtlmnr", "111122222222334556")
+
+def tokenize(text):
+    return _TOKEN.findall((text or "").lower())
+
+def soundex(word):
+    """Classic 4-character Soundex code (phonetic match for misheard names)."""
+    if not word: return ""
+    digits = word.translate(_SOUNDEX)
+    code, prev = word[0].upper(), digits[0]
+    for ch, d in zip(word[1:], digits[1:]):
+        if d.isdigit() and d != prev:
+            code += d
+        if ch not in "hw": prev = d
+    return (code + "000")[:4]
+
+def _trigrams(word):
+    w = f"  {word} "
+    return {w[i:i + 3] for i in range(len(w) - 2)}
+
+class CandidateIndex:
+    """Inverted token / phonetic / trigram index over the names (and aliases) of a list of dicts."""
+
+    def __init__(self, items, fields=("name",)):
+        self.items = items
+        self.size = len(items)
+        self.phrases = [] # item idx -> list of token lists (one per name/alias)
+        self.by_token, self.by_sound, self.by_gram = {}, {}, {}
+        for idx, item in enumerate(items):
+            names = []
+            for field in fields:
+                val = item.get(field)
+                names.extend(val if isinstance(val, list) else [val])
+            phrases = [tokenize(n) for n in names if n]
+            self.phrases.append([p for p in phrases if p])
+            for phrase in self.phrases[-1]:
+                for tok in phrase:
+                    self.by_token.setdefault(tok, set()).add(idx)
+                    self.by_sound.setdefault(soundex(tok), set()).add(idx)
+                    for g in _trigrams(tok):
+                        self.by_gram.setdefault(g, set()).add(idx)
+
+    @staticmethod
+    def _token_score(tok, query_tokens):
+        best = 0.0
+        for q in query_tokens:
+            if q == tok: return 1.0
+            if len(q) < 3 or len(tok) < 3: continue
+            if soundex(q) == soundex(tok): best = max(best, 0.8)
+            else:
+                ratio = difflib.SequenceMatcher(None, q, tok).ratio()
+                if ratio >= 0.75: best = max(best, ratio * 0.7)
+        return best
+
+    def top_k(self, text, k=8):
+        """Returns up to k items ranked by how well one of their names matches the text."""
+        query = [q for q in tokenize(text) if q not in _STOPWORDS]
+        candidates = set()
+        for q in query:
+            candidates |= self.by_token.get(q, set())
+            if len(q) >= 3:
+                candidates |= self.by_sound.get(soundex(q), set())
+                grams = _trigrams(q)
+                hits = {}
+                for g in grams:
+                    for idx in self.by_gram.get(g, ()):
+                        hits[idx] = hits.get(idx, 0) + 1
+                candidates |= {idx for idx, n in hits.items() if n >= len(grams) // 2}
+
+        scored = []
+        for idx in candidates:
+            best = 0.0
+            for phrase in self.phrases[idx]:
+                best = max(best, sum(self._token_score(t, query) for t in phrase) / len(phrase))
+            if best > 0: scored.append((best, idx))
+        scored.sort(key=lambda s: (-s[0], s[1]))
+        return [self.items[idx] for _, idx in scored[:k]]
+
+_indexes = {}
+
+def select_candidates(items, text, k=8, fields=("name",)):
+    """
+    Names of the k items most relevant to text. Small lists are returned whole
+    so short address books keep the old prompt behaviour.
+    """
+    if len(items) <= k:
+        return [i['name'] for i in items]
+    key = (id(items), fields)
+    index = _indexes.get(key)
+    if index is None or index.items is not items or index.size != len(items):
+        index = _indexes[key] = CandidateIndex(items, fields)
+    return [i['name'] for i in index.top_k(text, k)]
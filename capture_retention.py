@@ -0,0 +1,124 @@
+import os
+import re
+import time
+import threading
+import cv2
+
+EVIDENCE_EXTS = ('.jpg', '.jpeg', '.png', '.webm', '.mp4', '.avi')
+
+class CaptureRetention:
+    """
+    Background housekeeping of the security capture directory, every interval_s:
+    1. event retention (EventStore days / count limits); files no remaining event needs go too
+    2. JPEG captures older than recompress_days are re-encoded once at recompress_quality
+       (renamed *.q<quality>.jpg; the log and the thumbnail follow)
+    3. disk budget: oldest files first until the captures fit in max_mb; their events stay, without a file
+    4. events whose file is missing on disk are detached from it
+    Files the log does not know count towards the budget but are otherwise left alone.
+    """
+
+    def __init__(self, capture_dir, events, thumbs, max_mb=2048, recompress_days=None, recompress_quality=60, interval_s=600):
+        self.capture_dir = capture_dir
+        self.events = events
+        self.thumbs = thumbs
+        self.max_bytes = max_mb * 1024 * 1024 if max_mb else None # None = no budget
+        self.recompress_days = recompress_days
+        self.recompress_quality = recompress_quality
+        self.recompressed_re = re.compile(r"\.q\d+\.jpg$", re.I)
+        self.interval_s = interval_s
+        self.lock = threading.Lock()
+        self.freed_bytes = 0
+        self.stats = {"runs": 0, "used_mb": 0.0, "evicted": 0, "freed_mb": 0.0, "recompressed": 0, "detached": 0}
+
+    def start(self):
+        def loop():
+            while True:
+                self.run_once()
+                time.sleep(self.interval_s)
+        threading.Thread(target=loop, name="capture-retention", daemon=True).start()
+
+    def run_once(self):
+        with self.lock: # The timer and manual runs never overlap
+            try:
+                self._expire()
+                self._recompress()
+                self._enforce_budget()
+                self._reconcile()
+            except Exception as e:
+                print(f"Capture Retention Error: {e}")
+            self.stats["runs"] += 1
+            return dict(self.stats)
+
+    # --- HELPERS ---
+    def _listing(self):
+        """[(mtime, size, name)] of evidence files, oldest first."""
+        files = []
+        for entry in os.scandir(self.capture_dir):
+            if entry.is_file() and entry.name.lower().endswith(EVIDENCE_EXTS):
+                st = entry.stat()
+                files.append((st.st_mtime, st.st_size, entry.name))
+        return sorted(files)
+
+    def _remove(self, name):
+        path = os.path.join(self.capture_dir, name)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return 0
+        self.thumbs.remove(name)
+        return size
+
+    # --- STEPS ---
+    def _expire(self):
+        dropped = {row['file'] for row in self.events.apply_retention() if row['file']}
+        if not dropped: return
+        for name in dropped - self.events.files(): # Deduplicated alerts can share one capture
+            self._remove(name)
+
+    def _recompress(self):
+        if not self.recompress_days: return
+        cutoff = time.time() - self.recompress_days * 86400
+        for mtime, size, name in self._listing():
+            if mtime >= cutoff: break
+            if not name.lower().endswith(('.jpg', '.jpeg')) or self.recompressed_re.search(name): continue
+            path = os.path.join(self.capture_dir, name)
+            new_name = f"{os.path.splitext(name)[0]}.q{self.recompress_quality}.jpg"
+            new_path = os.path.join(self.capture_dir, new_name)
+            image = cv2.imread(path)
+            if image is None: continue
+            ok, data = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.recompress_quality])
+            tmp = new_path + ".tmp"
+            with open(tmp, 'wb') as f:
+                if ok and len(data) < size: f.write(data.tobytes())
+                else: # Already small: keep the bytes, the new name just marks it as done
+                    with open(path, 'rb') as src: f.write(src.read())
+            os.replace(tmp, new_path)
+            os.utime(new_path, (mtime, mtime)) # Keeps its place in the oldest-first order
+            self.events.rename_file(name, new_name)
+            old_thumb = self.thumbs.path_for(name)
+            if os.path.exists(old_thumb): os.replace(old_thumb, self.thumbs.path_for(new_name))
+            os.remove(path)
+            self.stats["recompressed"] += 1
+
+    def _enforce_budget(self):
+        files = self._listing()
+        used = sum(size for _, size, _ in files)
+        evicted = []
+        if self.max_bytes:
+            for _, size, name in files:
+                if used <= self.max_bytes: break
+                self.freed_bytes += self._remove(name)
+                used -= size
+                evicted.append(name)
+        self.events.detach_files(evicted)
+        self.stats["evicted"] += len(evicted)
+        self.stats["freed_mb"] = round(self.freed_bytes / 1024 / 1024, 1)
+        self.stats["used_mb"] = round(used / 1024 / 1024, 1)
+
+    def _reconcile(self):
+        on_disk = set(os.listdir(self.capture_dir))
+        missing = [name for name in self.events.files() if name not in on_disk]
+        for name in missing: self.thumbs.remove(name)
+        self.stats["detached"] += len(missing)
+        self.events.detach_files(missing)
@@ -0,0 +1,97 @@
+import os
+import time
+import bisect
+import cv2
+import numpy as np
+
+def open_capture(source):
+    """
+    What a camera pipeline reads from. Device indexes and stream URLs open a cv2.VideoCapture;
+    video files are played through FrameSource.from_video, paced at their own rate like a live
+    camera (a bare VideoCapture would be drained at decode speed). Anything with
+    read()/grab()/isOpened()/release() (e.g. a FrameSource) is used as-is. A callable is called
+    first, which is how a source crosses into a spawned camera process (pass a picklable
+    factory such as functools.partial).
+    """
+    if callable(source): source = source()
+    if hasattr(source, "read"): return source
+    if isinstance(source, str) and os.path.isfile(source): return FrameSource.from_video(source)
+    return cv2.VideoCapture(source)
+
+class FrameSource:
+    """
+    cv2.VideoCapture stand-in fed by a frame iterable: synthetic fixtures, a decoded file, tests.
+    - items are BGR frames or (frame, truth) pairs; truth is whatever the caller scores against
+    - paced at fps like a live camera (fps=None: as fast as they are read)
+    - remembers when each frame was delivered, so truth_at(stamp) can score an analysed frame
+    """
+
+    def __init__(self, frames, fps=30, history=100000):
+        self.frames = iter(frames)
+        self.history = history # Delivery records kept (an endless looped file must not grow without bound)
+        self.interval = 1.0 / fps if fps else 0.0
+        self.next_due = None
+        self.times, self.truths = [], []
+        self.opened = True
+
+    @classmethod
+    def from_video(cls, path, fps=None, loop=False):
+        """Frames of a video file, paced at fps (default: the file's own rate)."""
+        def frames():
+            while True:
+                cap = cv2.VideoCapture(path)
+                while True:
+                    ok, frame = cap.read()
+                    if not ok: break
+                    yield frame
+                cap.release()
+                if not loop: return
+        probe = cv2.VideoCapture(path)
+        fps = fps or probe.get(cv2.CAP_PROP_FPS) or 30
+        probe.release()
+        return cls(frames(), fps)
+
+    def isOpened(self):
+        return self.opened
+
+    def _next(self):
+        item = next(self.frames, None)
+        if item is None:
+            self.opened = False
+            return None
+        frame, truth = item if isinstance(item, tuple) else (item, None)
+        if self.interval:
+            now = time.time()
+            self.next_due = now if self.next_due is None else self.next_due
+            time.sleep(max(0, self.next_due - now))
+            self.next_due = max(self.next_due + self.interval, time.time() - self.interval) # No catch-up bursts
+        self.times.append(time.time())
+        self.truths.append(truth)
+        if len(self.times) > self.history:
+            del self.times[:self.history // 2], self.truths[:self.history // 2]
+        return frame
+
+    def read(self, image=None):
+        frame = self._next()
+        if frame is None: return False, None
+        if image is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            frame = image
+        return True, frame
+
+    def grab(self):
+        return self._next() is not None
+
+    def release(self):
+        self.opened = False
+
+    def truth_at(self, stamp):
+        """Truth of the last frame delivered at or before stamp (a FrameRing commit time)."""
+        i = bisect.bisect_right(self.times, stamp) - 1
+        return self.truths[i] if i >= 0 else None
+
+    def first_delivery(self, predicate):
+        """Delivery time of the first frame whose truth matches predicate (e.g. onset of motion)."""
+        for t, truth in zip(self.times, self.truths):
+            if predicate(truth): return t
+        return None
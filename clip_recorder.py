@@ -0,0 +1,133 @@
+import os
+import time
+import threading
+import collections
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import cv2
+import numpy as np
+
+# Tried in order; VP8/WebM plays inline in the browser, mp4v is the fallback every OpenCV build has
+CODECS = [("VP80", ".webm"), ("mp4v", ".mp4")]
+
+def encode_clip(jpegs, path_base, fps):
+    """Runs in the encoder process: decodes the JPEG ring snapshot and writes a video. Returns the file path."""
+    first = cv2.imdecode(np.frombuffer(jpegs[0], np.uint8), cv2.IMREAD_COLOR)
+    h, w = first.shape[:2]
+    for fourcc, ext in CODECS:
+        path = path_base + ext
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, (w, h))
+        if not writer.isOpened(): continue
+        writer.write(first)
+        for data in jpegs[1:]:
+            frame = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+            if frame.shape[:2] != (h, w): frame = cv2.resize(frame, (w, h))
+            writer.write(frame)
+        writer.release()
+        return path
+    raise RuntimeError("No usable video codec")
+
+class ClipRecorder:
+    """
+    Keeps the last pre_s seconds of JPEG-compressed frames in memory (bounded by max_mb) and,
+    when motion fires, turns pre-roll .. post-roll into a video clip.
+    - runs as its own reader of the FrameRing at a fixed clip fps, so analysis never pays for it
+    - every trigger while recording extends the post-roll (capped at max_clip_s)
+    - encoding happens in a separate process (executor="thread" inside camera worker processes)
+    """
+
+    def __init__(self, out_dir, pre_s=5, post_s=5, fps=10, max_mb=64, quality=70, width=640, max_clip_s=60,
+                 on_saved=None, prefix="clip", executor="process"):
+        self.out_dir = out_dir
+        self.prefix = prefix
+        self.executor = executor
+        self.pre_s = pre_s
+        self.post_s = post_s
+        self.fps = fps
+        self.max_bytes = max_mb * 1024 * 1024
+        self.quality = quality
+        self.width = width # Frames are downscaled to this width before compression (None = full size)
+        self.max_clip_s = max_clip_s
+        self.on_saved = on_saved # on_saved(path, start_datetime)
+        self.buffer = collections.deque() # (stamp, jpeg bytes)
+        self.buffer_bytes = 0
+        self.clip = None # {"start", "until", "frames"} while recording
+        self.lock = threading.Lock()
+        self.pool = None
+        self.stats = {"buffered": 0, "clips": 0, "failed": 0, "encode_ms": 0.0}
+
+    # --- BUFFER ---
+    def compress(self, frame):
+        if self.width and frame.shape[1] > self.width:
+            scale = self.width / float(frame.shape[1])
+            frame = cv2.resize(frame, (self.width, int(frame.shape[0] * scale)), interpolation=cv2.INTER_AREA)
+        ok, data = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return data.tobytes() if ok else None
+
+    def feed(self, stamp, frame=None, data=None):
+        data = data if data is not None else self.compress(frame)
+        if data is None: return
+        with self.lock:
+            self.buffer.append((stamp, data))
+            self.buffer_bytes += len(data)
+            # Drop by age (pre-roll window) and by memory budget, oldest first
+            while self.buffer and (self.buffer[0][0] < stamp - self.pre_s or self.buffer_bytes > self.max_bytes):
+                self.buffer_bytes -= len(self.buffer.popleft()[1])
+            self.stats["buffered"] = len(self.buffer)
+            if self.clip:
+                self.clip["frames"].append(data)
+                if stamp >= self.clip["until"]: self._finish()
+
+    def trigger(self, stamp):
+        """Motion at stamp: starts a clip with the buffered pre-roll, or extends the running one."""
+        with self.lock:
+            if self.clip:
+                self.clip["until"] = min(stamp + self.post_s, self.clip["start"] + self.max_clip_s)
+                return
+            self.clip = {"start": self.buffer[0][0] if self.buffer else stamp, "until": stamp + self.post_s,
+                         "frames": [data for _, data in self.buffer]}
+
+    def _finish(self):
+        clip, self.clip = self.clip, None
+        if not clip["frames"]: return
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=1) if self.executor == "process" else ThreadPoolExecutor(max_workers=1)
+        started = time.strftime("%Y%m%d_%H%M%S", time.localtime(clip["start"]))
+        path_base = os.path.join(self.out_dir, f"{self.prefix}_{started}")
+        submitted = time.perf_counter()
+        future = self.pool.submit(encode_clip, clip["frames"], path_base, self.fps)
+        future.add_done_callback(lambda f: self._saved(f, clip["start"], submitted))
+
+    def _saved(self, future, start, submitted):
+        try:
+            path = future.result()
+        except Exception as e:
+            self.stats["failed"] += 1
+            print(f"Clip Encode Error: {e}")
+            return
+        self.stats["clips"] += 1
+        self.stats["encode_ms"] = round((time.perf_counter() - submitted) * 1000)
+        if self.on_saved: self.on_saved(path, start)
+
+    # --- READER LOOP ---
+    def run(self, ring, active):
+        """Samples the newest ring frame at self.fps until active() is False; flushes a running clip."""
+        last_seq, interval = -1, 1.0 / self.fps
+        next_due = time.time()
+        while active():
+            with ring.latest(last_seq, timeout=interval) as item:
+                if item is not None:
+                    last_seq, stamp, frame = item
+                    self.feed(stamp, frame)
+                elif self.buffer:
+                    # Camera is slower than the clip rate (idle mode): hold the last frame so clips keep real time
+                    self.feed(time.time(), data=self.buffer[-1][1])
+            next_due += interval
+            time.sleep(max(0, next_due - time.time()))
+            next_due = max(next_due, time.time())
+        with self.lock:
+            if self.clip: self._finish()
+            self.buffer.clear()
+            self.buffer_bytes = 0
+
+    def memory_mb(self):
+        return round(self.buffer_bytes / 1024 / 1024, 1)
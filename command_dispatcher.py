@@ -0,0 +1,231 @@
+import re
+import json
+import dateparser
+import musiclibrary
+import intent_router
+import llm_cache
+from candidate_index import select_candidates
+from Project_core import speak, quick_response, play_song, aiprocess_stream, SentenceSpeaker
+
+# A classification that starts like this is a chat answer we can speak while it streams.
+_CHAT_PREFIX = re.compile(r'\s*\{\s*"module"\s*:\s*"chat"\s*,\s*"reply"\s*:\s*"')
+
+def _partial_json_string(raw):
+    """Decodes the streamed body of a JSON string (without its opening quote) as far as possible."""
+    i = 0
+    while i < len(raw):
+        if raw[i] == '\\':
+            i += 2
+            continue
+        if raw[i] == '"':
+            return json.loads('"' + raw[:i] + '"')
+        i += 1
+    body = raw[:-1] if i > len(raw) else raw # Ends mid-escape
+    try:
+        return json.loads('"' + body + '"')
+    except ValueError:
+        return None # Incomplete \uXXXX escape, wait for more
+
+class CommandDispatcher:
+    """
+    Routes a Command Center command to the right assistant.
+    Deterministic rules are tried first; everything else is classified
+    across all modules with ONE structured LLM call (which also carries
+    the chat answer, so small talk needs no second inference).
+    """
+
+    def __init__(self, sec_bot=None, desk_bot=None, rem_bot=None, msg_bot=None, email_bot=None):
+        self.sec_bot = sec_bot
+        self.desk_bot = desk_bot
+        self.rem_bot = rem_bot
+        self.msg_bot = msg_bot
+        self.email_bot = email_bot
+        self.last_result = None
+        self.on_update = None
+
+    # --- CLASSIFICATION ---
+    def _fast_route(self, text):
+        if self.sec_bot:
+            r = intent_router.match_security(text)
+            if r: return dict(r, module="security")
+        if self.desk_bot:
+            r = intent_router.match_desktop(text, self.desk_bot.apps)
+            if r: return dict(r, module="desktop")
+        if self.rem_bot:
+            r = intent_router.match_reminder(text)
+            if r: return dict(r, module="reminders")
+        if self.msg_bot:
+            r = intent_router.match_messaging(text, self.msg_bot.contacts)
+            if r: return dict(r, module="messaging")
+        if self.email_bot:
+            r = intent_router.match_email(text, self.email_bot.contacts)
+            if r: return dict(r, module="email")
+        resp = quick_response(text)
+        if resp is not None:
+            return {"module": "system", "reply": resp}
+        return None
+
+    def _llm_classify(self, text):
+        apps = select_candidates(self.desk_bot.apps, text, fields=("name", "aliases")) if self.desk_bot else []
+        contacts = select_candidates(self.msg_bot.contacts, text) if self.msg_bot else []
+        prompt = f"""
+        You are the command router of a voice assistant (J.A.R.V.I.S.).
+        Command: "{text}"
+        Configured Apps: {apps}
+        Contacts: {contacts}
+        Songs: {list(musiclibrary.music.keys())}
+
+        Return JSON with "module" plus the fields for that module:
+        - "security": intent (activate|deactivate|show_log|settings), setting_key (sensitivity|email_alert), setting_value (high/low|on/off)
+        - "desktop": intent (open_app|close_app|screenshot|set_volume|set_brightness|lock_screen|type_text|scroll), target (app name or null), value (integer or text or null)
+        - "reminders": intent (reminder|todo|shopping), content, time (natural language, reminders only), category, recurring (daily|weekly|null)
+        - "messaging": intent (send|schedule), platform (whatsapp|telegram), recipient_name, message_body, schedule_time (natural text or null)
+        - "email": recipient_name, recipient_email, subject, body (null if not dictated)
+        - "music": song
+        - "chat": reply (short, technical answer to the command)
+
+        Example: "Open Chrome" -> {{"module": "desktop", "intent": "open_app", "target": "Chrome"}}
+        Example: "Who invented the telephone?" -> {{"module": "chat", "reply": "Alexander Graham Bell, 1876."}}
+        Always put "module" first. Return ONLY JSON.
+        """
+        content, speaker, streamed = "", None, ""
+        try:
+            for piece in llm_cache.chat_stream('dispatch.classify', [{'role': 'user', 'content': prompt}]):
+                content += piece
+                m = _CHAT_PREFIX.match(content)
+                if not m: continue
+                # Chat answer: speak and display it while the model is still generating
+                reply = _partial_json_string(content[m.end():])
+                if reply is not None and len(reply) > len(streamed):
+                    speaker = speaker or SentenceSpeaker()
+                    speaker.feed(reply[len(streamed):])
+                    streamed = reply
+                    if self.on_update: self.on_update(reply)
+        except Exception as e:
+            print(f"Dispatch error: {e}")
+        if speaker: speaker.close()
+
+        try:
+            start, end = content.find('{'), content.rfind('}') + 1
+            if start != -1:
+                data = json.loads(content[start:end])
+                if data.get('module'):
+                    data['spoken'] = speaker is not None
+                    return data
+        except ValueError as e:
+            print(f"Dispatch parse error: {e}")
+        return {"module": "chat", "reply": streamed or None, "spoken": speaker is not None}
+
+    def classify(self, text):
+        route = self._fast_route(text) or self._llm_classify(text)
+        route['command'] = text
+        return route
+
+    # --- EXECUTION ---
+    def dispatch(self, text, on_update=None):
+        """
+        Classifies and executes a command. Returns the response text (also spoken).
+        on_update(text_so_far) receives chat answers incrementally while they stream.
+        """
+        self.on_update = on_update
+        route = self.classify(text)
+        self.last_result = route
+        handler = getattr(self, f"_run_{route.get('module')}", None)
+        try:
+            resp = handler(route) if handler else route.get('reply')
+        except Exception as e:
+            resp = f"Execution Error: {e}"
+        resp = resp or "Command not recognized."
+        if not route.get('spoken'): speak(resp)
+        return resp
+
+    def _run_system(self, r):
+        return r.get('reply')
+
+    def _run_chat(self, r):
+        # The router normally answers inline; only fall back to a full chat call if it did not.
+        if r.get('reply'): return r['reply']
+        r['spoken'] = True
+        return aiprocess_stream(r['command'], self.on_update)
+
+    def _run_music(self, r):
+        return play_song(r.get('song') or "")
+
+    def _run_security(self, r):
+        if not self.sec_bot: return "Security module offline."
+        intent = r.get('intent')
+        if intent == 'activate':
+            return self.sec_bot.start_surveillance()
+        if intent == 'deactivate':
+            return self.sec_bot.stop_surveillance()
+        if intent == 'show_log':
+            return f"{self.sec_bot.events.count()} security events logged. Open Security Mode to review."
+        if intent == 'settings':
+            key, val = r.get('setting_key'), str(r.get('setting_value') or "").lower()
+            if key == 'sensitivity' and val in ('high', 'low'):
+                self.sec_bot.sensitivity = 1500 if val == 'high' else 8000
+                return f"Motion sensitivity set to {val}."
+            if key == 'email_alert' and val in ('on', 'off'):
+                self.sec_bot.alert_email = val == 'on'
+                return f"Email alerts {val}."
+        return None
+
+    def _run_desktop(self, r):
+        if not self.desk_bot: return "Desktop module offline."
+        intent, target, val = r.get('intent'), r.get('target'), r.get('value')
+        ok, msg = False, None
+        if intent == 'open_app':
+            ok, msg = self.desk_bot.open_app(target)
+        elif intent == 'close_app':
+            ok, msg = self.desk_bot.close_app(target)
+        elif intent == 'screenshot':
+            ok, msg = self.desk_bot.take_screenshot()
+        elif intent == 'set_volume':
+            ok, msg = self.desk_bot.set_volume(int(val))
+        elif intent == 'set_brightness':
+            ok, msg = self.desk_bot.set_brightness(int(val))
+        elif intent == 'lock_screen':
+            ok, msg = self.desk_bot.lock_computer()
+        elif intent == 'type_text':
+            ok, msg = self.desk_bot.type_text(str(val))
+        elif intent == 'scroll':
+            ok, msg = self.desk_bot.scroll(int(val))
+        return msg
+
+    def _run_reminders(self, r):
+        if not self.rem_bot: return "Reminders module offline."
+        intent, content = r.get('intent'), r.get('content')
+        if not content: return None
+        if intent == 'reminder':
+            return self.rem_bot.add_reminder(content, r.get('time') or "now", r.get('category') or "General", r.get('recurring'))
+        if intent == 'todo':
+            return self.rem_bot.add_todo(content)
+        if intent == 'shopping':
+            return self.rem_bot.add_shopping(content)
+        return None
+
+    def _run_messaging(self, r):
+        if not self.msg_bot: return "Messaging module offline."
+        contact = self.msg_bot.get_contact(r.get('recipient_name') or '')
+        if not contact: return "Contact not found."
+        platform, body = (r.get('platform') or 'whatsapp').lower(), r.get('message_body') or ''
+        if r.get('intent') == 'schedule' and r.get('schedule_time'):
+            dt = dateparser.parse(r['schedule_time'])
+            if not dt: return "Could not understand the schedule time."
+            ok, msg = self.msg_bot.schedule_message(platform, contact, body, dt.isoformat())
+            return msg
+        if platform == 'telegram' and contact.get('telegram_id'):
+            ok, msg = self.msg_bot.send_telegram(contact['telegram_id'], body)
+        elif contact.get('phone'):
+            ok, msg = self.msg_bot.send_whatsapp(contact['phone'], body)
+        else:
+            msg = f"No {platform} details for {contact['name']}."
+        return msg
+
+    def _run_email(self, r):
+        # Emails are never sent blind: the parsed draft is handed to the Email Protocol page.
+        if not self.email_bot: return "Email module offline."
+        if not r.get('recipient_email') and r.get('recipient_name'):
+            r['recipient_email'] = self.email_bot.get_email_from_name(r['recipient_name'])
+        who = r.get('recipient_email') or r.get('recipient_name') or "recipient"
+        return f"Email draft to {who} ready in Email Protocol."
@@ -4,7 +4,9 @@ import subprocess
 import time
 import psutil
 import pyautogui
-import ollama
+import llm_cache
+import intent_router
+from candidate_index import select_candidates
 import screen_brightness_control as sbc
 from datetime import datetime
 
@@ -147,12 +149,30 @@ class DesktopAssistant:
         except:
             return False, "Lock failed (Windows only)."
 
+    def type_text(self, text):
+        try:
+            pyautogui.write(text, interval=0.02)
+            self.log_action("Type", text[:30])
+            return True, "Text typed."
+        except Exception as e:
+            return False, str(e)
+
+    def scroll(self, amount):
+        """Positive scrolls up, negative scrolls down (in notches)."""
+        try:
+            pyautogui.scroll(int(amount) * 100)
+            return True, f"Scrolled {'up' if amount > 0 else 'down'}."
+        except Exception as e:
+            return False, str(e)
+
     # --- LLM PARSING ---
     def parse_desktop_command(self, text):
+        fast = intent_router.match_desktop(text, self.apps)
+        if fast: return fast
         try:
             prompt = f"""
             Analyze desktop command: "{text}"
-            Configured Apps: {[a['name'] for a in self.apps]}
+            Configured Apps: {select_candidates(self.apps, text, fields=("name", "aliases"))}
             
             Return JSON with:
             - intent: open_app, close_app, screenshot, set_volume, set_brightness, lock_screen, type_text, scroll
@@ -163,8 +183,7 @@ class DesktopAssistant:
             Example: "Volume 50" -> {{"intent": "set_volume", "value": 50}}
             """
             
-            response = ollama.chat(model='llama3.2', messages=[{'role': 'user', 'content': prompt}])
-            content = response['message']['content']
+            content = llm_cache.chat('desktop.parse', [{'role': 'user', 'content': prompt}])
             start, end = content.find('{'), content.rfind('}') + 1
             if start != -1:
                 return json.loads(content[start:end])
@@ -6,7 +6,9 @@ from email.mime.multipart import MIMEMultipart
 import json
 import os
 import config
-import ollama
+import llm_cache
+import intent_router
+from candidate_index import select_candidates
 from bs4 import BeautifulSoup
 import re
 
@@ -63,24 +65,24 @@ class EmailAssistant:
             
             Return ONLY the body text. Do not include subject lines or placeholders like [Your Name].
             """
-            response = ollama.chat(model='llama3.2', messages=[{'role': 'user', 'content': prompt}])
-            return response['message']['content'].strip()
+            return llm_cache.chat('email.generate', [{'role': 'user', 'content': prompt}]).strip()
         except Exception as e:
             return f"Error generating email: {str(e)}"
 
     def parse_voice_command(self, text):
+        fast = intent_router.match_email(text, self.contacts)
+        if fast: return fast
         try:
             prompt = f"""
             You are an API that converts email commands into JSON.
-            Contacts: {[c['name'] for c in self.contacts]}
+            Contacts: {select_candidates(self.contacts, text)}
             Command: "{text}"
             
             Extract: 'recipient_name', 'recipient_email', 'subject', 'body'.
             If the user only mentions a topic but no body, leave body null.
             Return ONLY valid JSON.
             """
-            response = ollama.chat(model='llama3.2', messages=[{'role': 'user', 'content': prompt}])
-            content = response['message']['content']
+            content = llm_cache.chat('email.parse', [{'role': 'user', 'content': prompt}])
             start = content.find('{')
             end = content.rfind('}') + 1
             if start != -1:
@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import sqlite3
+import datetime
+import threading
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S" # Format of the legacy security_log.json timestamps (and of returned rows)
+
+class EventStore:
+    """
+    Append-only security event log (SQLite, WAL) indexed by timestamp and event type.
+    Rows come back as the old security_log.json dicts (timestamp/event/file) plus id and camera.
+    """
+
+    def __init__(self, db_path="security_events.db", legacy_json=None, retention_days=None, max_events=None):
+        self.db_path = db_path
+        self.retention_days = retention_days # None = keep forever
+        self.max_events = max_events # None = unbounded
+        self.lock = threading.Lock()
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL") # WAL keeps this crash-safe; skips an fsync per event
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts REAL NOT NULL,
+                event TEXT NOT NULL,
+                file TEXT,
+                camera TEXT
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_events_ts ON events(ts)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_events_type_ts ON events(event, ts)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_events_file ON events(file)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.commit()
+        if legacy_json: self.migrate_json(legacy_json)
+
+    # --- MIGRATION ---
+    def migrate_json(self, path):
+        """One-time import of the old security_log.json (recorded in meta, the file itself is left alone)."""
+        with self.lock:
+            if self.conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_json'").fetchone(): return 0
+            rows = []
+            if os.path.exists(path):
+                try:
+                    with open(path, 'r') as f: legacy = json.load(f)
+                except Exception as e:
+                    print(f"Event Store Migration Error: {e}")
+                    return 0 # Retried on the next start
+                for entry in legacy:
+                    try:
+                        ts = datetime.datetime.strptime(entry['timestamp'], TIME_FORMAT).timestamp()
+                    except (KeyError, ValueError):
+                        continue
+                    rows.append((ts, entry.get('event', "Unknown"), entry.get('file'), entry.get('camera')))
+            rows.sort() # Oldest first, so ids follow time like live appends
+            self.conn.executemany("INSERT INTO events (ts, event, file, camera) VALUES (?, ?, ?, ?)", rows)
+            self.conn.execute("INSERT INTO meta VALUES ('migrated_json', ?)", (f"{path} ({len(rows)} events)",))
+            self.conn.commit()
+            return len(rows)
+
+    # --- WRITE ---
+    def append(self, event, file=None, when=None, camera=None):
+        ts = (when or datetime.datetime.now()).timestamp()
+        with self.lock:
+            cur = self.conn.execute("INSERT INTO events (ts, event, file, camera) VALUES (?, ?, ?, ?)",
+                                    (ts, event, file, camera))
+            self.conn.commit()
+            return cur.lastrowid
+
+    def delete(self, ids):
+        if not ids: return 0
+        with self.lock:
+            cur = self.conn.executemany("DELETE FROM events WHERE id = ?", [(i,) for i in ids])
+            self.conn.commit()
+            return cur.rowcount
+
+    def detach_files(self, names):
+        """The files are gone (evicted / lost): their events stay, without a file."""
+        if not names: return 0
+        with self.lock:
+            cur = self.conn.executemany("UPDATE events SET file = NULL WHERE file = ?", [(n,) for n in names])
+            self.conn.commit()
+            return cur.rowcount
+
+    def rename_file(self, old, new):
+        with self.lock:
+            self.conn.execute("UPDATE events SET file = ? WHERE file = ?", (new, old))
+            self.conn.commit()
+
+    def apply_retention(self):
+        """Deletes events older than retention_days and beyond max_events. Returns the dropped rows."""
+        clauses = []
+        if self.retention_days:
+            clauses.append(("ts < ?", (time.time() - self.retention_days * 86400,)))
+        if self.max_events:
+            clauses.append(("id NOT IN (SELECT id FROM events ORDER BY ts DESC, id DESC LIMIT ?)", (self.max_events,)))
+        if not clauses: return []
+        where = " OR ".join(c for c, _ in clauses)
+        params = tuple(p for _, ps in clauses for p in ps)
+        with self.lock:
+            dropped = self._rows(f"SELECT id, ts, event, file, camera FROM events WHERE {where}", params)
+            self.conn.execute(f"DELETE FROM events WHERE {where}", params)
+            self.conn.commit()
+        return dropped
+
+    # --- READ ---
+    @staticmethod
+    def _where(start=None, end=None, event=None, camera=None):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(start.timestamp() if isinstance(start, datetime.datetime) else start)
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(end.timestamp() if isinstance(end, datetime.datetime) else end)
+        if event:
+            clauses.append("event = ?")
+            params.append(event)
+        if camera:
+            clauses.append("camera = ?")
+            params.append(camera)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _rows(self, sql, params):
+        return [{
+            "id": r[0],
+            "timestamp": datetime.datetime.fromtimestamp(r[1]).strftime(TIME_FORMAT),
+            "event": r[2],
+            "file": r[3],
+            "camera": r[4],
+        } for r in self.conn.execute(sql, params).fetchall()]
+
+    def query(self, start=None, end=None, event=None, camera=None, limit=50, offset=0):
+        """Newest first. start/end are datetimes or epoch seconds (end exclusive)."""
+        where, params = self._where(start, end, event, camera)
+        with self.lock:
+            return self._rows(f"SELECT id, ts, event, file, camera FROM events{where} "
+                              f"ORDER BY ts DESC, id DESC LIMIT ? OFFSET ?", params + [limit, offset])
+
+    def count(self, start=None, end=None, event=None, camera=None):
+        where, params = self._where(start, end, event, camera)
+        with self.lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM events{where}", params).fetchone()[0]
+
+    def files(self):
+        """Every file name the log refers to."""
+        with self.lock:
+            return {r[0] for r in self.conn.execute("SELECT DISTINCT file FROM events WHERE file IS NOT NULL")}
+
+    def event_types(self):
+        with self.lock:
+            return [r[0] for r in self.conn.execute("SELECT DISTINCT event FROM events ORDER BY event")]
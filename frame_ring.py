@@ -0,0 +1,77 @@
+import time
+import threading
+import contextlib
+import numpy as np
+
+class FrameRing:
+    """
+    Fixed set of preallocated frame slots shared by one writer and any number of readers.
+    - the writer decodes straight into a free slot (writable) and never blocks on readers
+    - readers pin the newest slot while they use it; pinned slots are never overwritten
+    - drop policy: readers always get the newest frame, older unread frames are overwritten
+    """
+
+    def __init__(self, slots=4):
+        self.slots = max(3, slots) # newest + one being written + one pinned by a reader
+        self.buffers = None
+        self.stamps = [0.0] * self.slots
+        self.pins = [0] * self.slots
+        self.newest = -1 # Slot index of the last committed frame
+        self.seq = -1 # Sequence number of the last committed frame
+        self.write_idx = None
+        self.cond = threading.Condition()
+
+    def _free_slot(self):
+        for step in range(1, self.slots + 1):
+            idx = (self.newest + step) % self.slots
+            if idx != self.newest and not self.pins[idx]: return idx
+        return (self.newest + 1) % self.slots # Unreachable while readers release their pins
+
+    # --- WRITER ---
+    def writable(self):
+        """Slot the next frame can be decoded into (cap.read(image=...)); None until the frame size is known."""
+        with self.cond:
+            if self.buffers is None: return None
+            self.write_idx = self._free_slot()
+            return self.buffers[self.write_idx]
+
+    def commit(self, frame, stamp=None):
+        """Publishes frame as the newest. Copies only if it was not decoded into the writable slot."""
+        with self.cond:
+            if self.buffers is None or self.buffers.shape[1:] != frame.shape or self.buffers.dtype != frame.dtype:
+                self.buffers = np.empty((self.slots,) + frame.shape, frame.dtype) # (Re)allocated once per resolution
+                self.pins = [0] * self.slots
+                self.newest, self.write_idx = -1, None
+            idx = self.write_idx
+            if idx is None or self.pins[idx] or idx == self.newest:
+                idx = self._free_slot()
+            self.write_idx = None
+        if not np.may_share_memory(frame, self.buffers[idx]):
+            np.copyto(self.buffers[idx], frame) # Slot is neither newest nor pinned: safe outside the lock
+        with self.cond:
+            self.stamps[idx] = stamp or time.time()
+            self.newest = idx
+            self.seq += 1
+            self.cond.notify_all()
+        return self.seq
+
+    # --- READERS ---
+    @contextlib.contextmanager
+    def latest(self, after_seq=-1, timeout=1.0):
+        """
+        with ring.latest(last_seq) as item: yields (seq, stamp, frame) for the newest frame newer
+        than after_seq, or None after timeout. The frame is only valid inside the block.
+        """
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.seq > after_seq and self.newest >= 0, timeout):
+                idx = None
+            else:
+                idx, seq = self.newest, self.seq
+                self.pins[idx] += 1
+        if idx is None:
+            yield None
+            return
+        try:
+            yield seq, self.stamps[idx], self.buffers[idx]
+        finally:
+            with self.cond: self.pins[idx] = max(0, self.pins[idx] - 1) # Ring may have been re-allocated meanwhile
@@ -0,0 +1,41 @@
+import time
+import cv2
+import numpy as np
+
+def dhash(image):
+    """64-bit difference hash of a BGR / gray image or of JPEG bytes (decoded at 1/8 size, it only needs 9x8)."""
+    if isinstance(image, (bytes, bytearray)):
+        image = cv2.imdecode(np.frombuffer(image, np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    elif image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(image, (9, 8), interpolation=cv2.INTER_AREA)
+    return int.from_bytes(np.packbits(small[:, 1:] > small[:, :-1]).tobytes(), "big")
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+class NearDuplicateFilter:
+    """
+    Remembers the perceptual hashes of recently kept frames per key (camera) for window_s seconds.
+    match() returns what was stored with a near-identical frame (<= max_distance differing bits), else None;
+    valid(value) can drop entries whose value went stale (e.g. the file was deleted).
+    """
+
+    def __init__(self, window_s=300, max_distance=6):
+        self.window_s = window_s
+        self.max_distance = max_distance
+        self.recent = {} # key -> [(time, hash, value)]
+        self.skipped = 0
+
+    def match(self, key, image_hash, now=None, valid=None):
+        now = now or time.time()
+        recent = [r for r in self.recent.get(key, []) if now - r[0] < self.window_s and (valid is None or valid(r[2]))]
+        self.recent[key] = recent
+        for _, h, value in recent:
+            if hamming(h, image_hash) <= self.max_distance:
+                self.skipped += 1
+                return value
+        return None
+
+    def add(self, key, image_hash, value, now=None):
+        self.recent.setdefault(key, []).append((now or time.time(), image_hash, value))
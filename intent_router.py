@@ -0,0 +1,209 @@
+import re
+import datetime
+import dateparser
+
+# Deterministic fast path that runs before the Ollama parsers.
+# Every grammar below is compiled once and anchored on the whole (normalized)
+# command, so a match is treated as high confidence and returned directly.
+# Anything ambiguous (unknown contact/app, unparseable time, ...) returns None
+# and the caller falls back to the LLM.
+
+_FILLER_PREFIX = re.compile(r"^(?:(?:hey|ok|okay)\s+)?(?:jarvis|armor)[,\s]+|^(?:please|can you|could you)\s+", re.I)
+_FILLER_SUFFIX = re.compile(r"\s+(?:please|now|for me)$", re.I)
+_SPACES = re.compile(r"\s+")
+
+def normalize(text):
+    """Strip punctuation/filler words and collapse whitespace (case is kept for payloads)."""
+    t = _SPACES.sub(" ", text or "").strip().rstrip(".!?")
+    prev = None
+    while prev != t:
+        prev = t
+        t = _FILLER_PREFIX.sub("", t).strip()
+        t = _FILLER_SUFFIX.sub("", t).strip()
+    return t
+
+def strip_prefix(text):
+    """Only the leading filler ("jarvis, please ..."): for commands whose payload is dictated verbatim."""
+    t = (text or "").strip()
+    prev = None
+    while prev != t:
+        prev = t
+        t = _FILLER_PREFIX.sub("", t).strip()
+    return t
+
+def _match(rules, text, items=None):
+    for pattern, build in rules:
+        m = pattern.fullmatch(text)
+        if m:
+            result = build(m, items)
+            if result is not None:
+                return result
+    return None
+
+def _lookup(items, name, fields=("name",)):
+    """Exact (case-insensitive) lookup of a spoken name in contacts/apps."""
+    name = name.strip().lower()
+    if not name or not items: return None
+    for item in items:
+        for field in fields:
+            val = item.get(field)
+            values = val if isinstance(val, list) else [val]
+            if any(v and v.lower() == name for v in values):
+                return item
+    # Allow unique first names ("email aman about ...")
+    hits = [i for i in items if i.get('name') and i['name'].lower().split()[0] == name]
+    return hits[0] if len(hits) == 1 else None
+
+# --- DESKTOP ---
+def _app_intent(intent):
+    def build(m, apps):
+        app = _lookup(apps, m.group('app'), fields=("name", "aliases"))
+        if not app: return None
+        return {"intent": intent, "target": app['name'], "value": None}
+    return build
+
+def _level(intent):
+    return lambda m, _: {"intent": intent, "target": None, "value": max(0, min(100, int(m.group('n'))))}
+
+def _fixed_desktop(intent, value=None):
+    return lambda m, _: {"intent": intent, "target": None, "value": value}
+
+def _scroll(m, _):
+    n = int(m.group('n') or 5)
+    return {"intent": "scroll", "target": None, "value": n if m.group('dir').lower() == "up" else -n}
+
+_APP = r"(?:the\s+)?(?P<app>[\w .+-]+?)(?:\s+app(?:lication)?)?"
+_PERCENT = r"(?:\s*%|\s+percent)?"
+
+_DESKTOP_RULES = [
+    (re.compile(r"(?:open|launch|start|run)\s+" + _APP, re.I), _app_intent("open_app")),
+    (re.compile(r"(?:close|quit|exit|kill)\s+" + _APP, re.I), _app_intent("close_app")),
+    (re.compile(r"(?:take\s+(?:a\s+)?)?(?:screenshot|screen\s*shot|screen capture)", re.I), _fixed_desktop("screenshot")),
+    (re.compile(r"(?:set\s+)?(?:the\s+)?volume\s+(?:to\s+|at\s+)?(?P<n>\d{1,3})" + _PERCENT, re.I), _level("set_volume")),
+    (re.compile(r"(?:mute|silence)(?:\s+(?:the\s+)?(?:volume|sound|audio))?", re.I), _fixed_desktop("set_volume", 0)),
+    (re.compile(r"(?:set\s+)?(?:the\s+)?(?:screen\s+)?brightness\s+(?:to\s+|at\s+)?(?P<n>\d{1,3})" + _PERCENT, re.I), _level("set_brightness")),
+    (re.compile(r"lock(?:\s+(?:the|my))?(?:\s+(?:screen|computer|pc|workstation|system))?", re.I), _fixed_desktop("lock_screen")),
+    (re.compile(r"scroll\s+(?P<dir>up|down)(?:\s+(?:by\s+)?(?P<n>\d{1,3}))?", re.I), _scroll),
+]
+
+# Matched on the raw text: "now", "for me" or a full stop at the end belong to what is typed
+_TYPE_RULE = re.compile(r"type\s+(?P<text>.+)", re.I | re.S)
+
+def match_desktop(text, apps):
+    """Same structure as DesktopAssistant.parse_desktop_command."""
+    m = _TYPE_RULE.fullmatch(strip_prefix(text))
+    if m: return {"intent": "type_text", "target": None, "value": m.group('text')}
+    return _match(_DESKTOP_RULES, normalize(text), apps)
+
+# --- REMINDERS ---
+_RECUR_WORDS = r"every\s*day|daily|every\s*week|weekly"
+_RECUR = r"(?:\s+(?P<recur>" + _RECUR_WORDS + r"))?"
+_RECUR_BEFORE = r"(?:\s+(?P<recur_before>" + _RECUR_WORDS + r"))?" # "remind me (to stretch) every day at 10am ..."
+_TIME = r"(?P<time>(?:at|in|on|by|this)\s+.+?|(?:today|tomorrow|tonight)(?:\s+.+?)?)"
+
+def _reminder(m, _):
+    when = m.group('time')
+    # English only: on junk splits, dateparser's language detection costs seconds
+    if not dateparser.parse(when, languages=['en']): return None
+    recur = m.group('recur') or m.group('recur_before')
+    if recur:
+        recur = recur.lower()
+        recur = "daily" if "day" in recur or recur == "daily" else "weekly"
+    return {"intent": "reminder", "content": m.group('content').strip(), "time": when,
+            "category": None, "recurring": recur}
+
+def _list_item(intent):
+    return lambda m, _: {"intent": intent, "content": m.group('content').strip(), "time": None,
+                         "category": None, "recurring": None}
+
+_REMINDER_RULES = [
+    (re.compile(r"remind me (?:to\s+)?(?P<content>.+?)" + _RECUR_BEFORE + r"\s+" + _TIME + _RECUR, re.I), _reminder),
+    (re.compile(r"remind me" + _RECUR_BEFORE + r"\s+" + _TIME + r"\s+to\s+(?P<content>.+?)" + _RECUR, re.I), _reminder),
+    (re.compile(r"(?:add|put)\s+(?P<content>.+?)\s+(?:to|on)\s+(?:my\s+|the\s+)?(?:shopping|grocery|groceries)(?:\s+list)?", re.I), _list_item("shopping")),
+    (re.compile(r"(?:add|put)\s+(?P<content>.+?)\s+(?:to|on)\s+(?:my\s+|the\s+)?to[\s-]?do(?:\s+list)?", re.I), _list_item("todo")),
+    (re.compile(r"(?:add\s+)?(?:a\s+)?(?:task|todo|to-do)[:\s]+(?P<content>.+)", re.I), _list_item("todo")),
+]
+
+def match_reminder(text):
+    """Same structure as RemindersAssistant.parse_command."""
+    return _match(_REMINDER_RULES, normalize(text))
+
+# --- MESSAGING ---
+def _send_message(m, contacts):
+    contact = _lookup(contacts, m.group('name'))
+    if not contact: return None
+    return {"intent": "send", "platform": m.group('platform').lower(), "recipient_name": contact['name'],
+            "message_body": m.group('body').strip(), "schedule_time": None}
+
+_PLATFORM = r"(?P<platform>whatsapp|telegram)"
+
+_MESSAGING_RULES = [
+    (re.compile(r"send\s+(?:a\s+)?" + _PLATFORM + r"(?:\s+message)?\s+to\s+(?P<name>.+?)\s+(?:saying|that says|says|that)\s+(?P<body>.+)", re.I), _send_message),
+    (re.compile(r"(?:message|text)\s+(?P<name>.+?)\s+on\s+" + _PLATFORM + r"\s+(?:saying|that)\s+(?P<body>.+)", re.I), _send_message),
+    (re.compile(_PLATFORM + r"\s+(?P<name>.+?)\s+(?:saying|that)\s+(?P<body>.+)", re.I), _send_message),
+]
+
+def match_messaging(text, contacts):
+    """Same structure as MessagingAssistant.parse_command (immediate sends only)."""
+    return _match(_MESSAGING_RULES, normalize(text), contacts)
+
+# --- EMAIL ---
+_EMAIL_ADDR = re.compile(r"[\w\.-]+@[\w\.-]+\.\w+")
+
+def _email(m, contacts):
+    name = m.group('name').strip()
+    subject = m.group('subject').strip()
+    if _EMAIL_ADDR.fullmatch(name):
+        return {"recipient_name": None, "recipient_email": name, "subject": subject, "body": None}
+    contact = _lookup(contacts, name)
+    if not contact: return None
+    return {"recipient_name": contact['name'], "recipient_email": contact.get('email'), "subject": subject, "body": None}
+
+_EMAIL_RULES = [
+    (re.compile(r"(?:send|write)\s+(?:an\s+)?e-?mail\s+to\s+(?P<name>\S+(?:\s+\S+)?)\s+(?:about|regarding|re)\s+(?P<subject>.+)", re.I), _email),
+    (re.compile(r"e-?mail\s+(?P<name>\S+(?:\s+\S+)?)\s+(?:about|regarding|re)\s+(?P<subject>.+)", re.I), _email),
+]
+
+def match_email(text, contacts):
+    """Same structure as EmailAssistant.parse_voice_command."""
+    return _match(_EMAIL_RULES, normalize(text), contacts)
+
+# --- SECURITY ---
+def _security(intent, key=None, value=None):
+    def build(m, _):
+        result = {"intent": intent}
+        if key:
+            result["setting_key"] = key
+            result["setting_value"] = value or m.group('value').lower()
+        return result
+    return build
+
+_SEC_TARGET = r"(?:\s+(?:the\s+)?(?:security|surveillance|camera|cameras|monitoring|alarm)(?:\s+(?:system|mode|protocol))?)"
+
+_SECURITY_RULES = [
+    (re.compile(r"(?:activate|enable|start|arm|turn on)" + _SEC_TARGET, re.I), _security("activate")),
+    (re.compile(r"(?:deactivate|disable|stop|disarm|turn off)" + _SEC_TARGET, re.I), _security("deactivate")),
+    (re.compile(r"(?:show|open|display)(?:\s+(?:the|me))?(?:\s+(?:security|surveillance|motion))?\s+(?:logs?|events|captures)", re.I), _security("show_log")),
+    (re.compile(r"(?:set\s+)?(?:motion\s+)?sensitivity\s+(?:to\s+)?(?P<value>high|low)", re.I), _security("settings", "sensitivity")),
+    (re.compile(r"(?:turn|switch)\s+(?P<value>on|off)\s+e-?mail\s+alerts?", re.I), _security("settings", "email_alert")),
+    (re.compile(r"(?:enable|turn on)\s+e-?mail\s+alerts?", re.I), _security("settings", "email_alert", "on")),
+    (re.compile(r"(?:disable|turn off)\s+e-?mail\s+alerts?", re.I), _security("settings", "email_alert", "off")),
+]
+
+def match_security(text):
+    """Same structure as SecuritySystem.parse_security_command."""
+    return _match(_SECURITY_RULES, normalize(text))
+
+# --- CORE (Command Center small talk) ---
+_CORE_RULES = [
+    (re.compile(r"(?:what(?:'s| is)\s+)?(?:the\s+)?(?:current\s+)?time(?:\s+(?:is it|now))?|what time is it", re.I),
+     lambda m, _: f"It is {datetime.datetime.now().strftime('%I:%M %p')}."),
+    (re.compile(r"(?:what(?:'s| is)\s+)?(?:the\s+|today's\s+)?date(?:\s+today)?|what day is (?:it|today)", re.I),
+     lambda m, _: f"Today is {datetime.datetime.now().strftime('%A, %d %B %Y')}."),
+    (re.compile(r"(?:hi|hello|hey)(?:\s+there)?", re.I), lambda m, _: "Online and ready."),
+    (re.compile(r"(?:thanks|thank you)(?:\s+(?:a lot|so much))?", re.I), lambda m, _: "Anytime."),
+]
+
+def match_core(text):
+    """Answers trivial Command Center queries locally instead of via aiprocess."""
+    return _match(_CORE_RULES, normalize(text))
@@ -0,0 +1,168 @@
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import config
+from llm_gateway import gateway, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+
+# Per call-site time-to-live in seconds (0 = never cache).
+# Parsers are deterministic for a given prompt, generations go stale faster.
+DEFAULT_TTLS = {
+    "core.chat": 60 * 60,
+    "desktop.parse": 7 * 24 * 3600,
+    "dispatch.classify": 60 * 60,
+    "email.parse": 24 * 3600,
+    "email.generate": 24 * 3600,
+    "messaging.parse": 24 * 3600,
+    "messaging.sentiment": 7 * 24 * 3600,
+    "messaging.reply": 60 * 60,
+    "reminders.parse": 24 * 3600,
+    "security.parse": 7 * 24 * 3600,
+}
+DEFAULT_MODEL = 'llama3.2'
+
+# Gateway queue priority per call site; anything not listed is interactive.
+SITE_PRIORITIES = {
+    "messaging.sentiment": PRIORITY_BACKGROUND,
+    "messaging.reply": PRIORITY_BACKGROUND,
+}
+
+class LLMCache:
+    """On-disk (SQLite) response cache keyed on (model, normalized prompt) with LRU eviction."""
+
+    def __init__(self, db_path="llm_cache.db", max_entries=5000, ttls=None):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self.lock = threading.Lock()
+        self.counters = {}
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                site TEXT,
+                model TEXT,
+                content TEXT,
+                cost REAL,
+                expires_at REAL,
+                accessed_at REAL
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses(accessed_at)")
+        self.conn.commit()
+
+    # --- KEYS ---
+    @staticmethod
+    def normalize(text):
+        return re.sub(r"\s+", " ", text).strip() # Case is kept: replies echo it (message bodies, typed text, subjects)
+
+    def make_key(self, model, messages):
+        norm = [(m.get('role'), self.normalize(m.get('content', ''))) for m in messages]
+        raw = json.dumps([model, norm], ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _count(self, site, field, amount=1):
+        c = self.counters.setdefault(site, {"hits": 0, "misses": 0, "saved_s": 0.0})
+        c[field] += amount
+
+    # --- GET / PUT ---
+    def get(self, site, key):
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute("SELECT content, cost, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and row[2] > now:
+                self.conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                self.conn.commit()
+                self._count(site, "hits")
+                self._count(site, "saved_s", row[1] or 0.0)
+                return row[0]
+            if row:
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.conn.commit()
+            self._count(site, "misses")
+            return None
+
+    def put(self, site, key, model, content, cost):
+        ttl = self.ttls.get(site, 0)
+        if ttl <= 0: return
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, site, model, content, cost, now + ttl, now))
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        """Drops expired rows, then least-recently-used rows above max_entries."""
+        self.conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+        count = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.max_entries:
+            self.conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.max_entries,))
+
+    # --- DIAGNOSTICS ---
+    def stats(self):
+        with self.lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            sites = {k: dict(v) for k, v in self.counters.items()}
+        return {
+            "entries": entries,
+            "hits": sum(v["hits"] for v in sites.values()),
+            "misses": sum(v["misses"] for v in sites.values()),
+            "saved_s": round(sum(v["saved_s"] for v in sites.values()), 2),
+            "sites": sites,
+        }
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM responses")
+            self.conn.commit()
+            self.counters = {}
+
+cache = LLMCache(
+    db_path=getattr(config, 'LLM_CACHE_DB', "llm_cache.db"),
+    max_entries=getattr(config, 'LLM_CACHE_MAX_ENTRIES', 5000),
+    ttls=getattr(config, 'LLM_CACHE_TTLS', None),
+)
+
+def chat(site, messages, model=DEFAULT_MODEL, timeout=None):
+    """Drop-in for ollama.chat(...)['message']['content'] that goes through the cache and the gateway."""
+    key = cache.make_key(model, messages)
+    content = cache.get(site, key)
+    if content is not None:
+        return content
+    start = time.time()
+    content = gateway.chat(messages, model, SITE_PRIORITIES.get(site, PRIORITY_INTERACTIVE), timeout)
+    cache.put(site, key, model, content, time.time() - start)
+    return content
+
+async def achat(site, messages, model=DEFAULT_MODEL, timeout=None):
+    """asyncio variant of chat() for event-loop callers (e.g. the Telegram handler)."""
+    key = cache.make_key(model, messages)
+    content = cache.get(site, key)
+    if content is not None:
+        return content
+    start = time.time()
+    content = await gateway.achat(messages, model, SITE_PRIORITIES.get(site, PRIORITY_INTERACTIVE), timeout)
+    cache.put(site, key, model, content, time.time() - start)
+    return content
+
+def chat_stream(site, messages, model=DEFAULT_MODEL, timeout=None):
+    """Streaming variant of chat(): yields content chunks, caching the full answer once done."""
+    key = cache.make_key(model, messages)
+    content = cache.get(site, key)
+    if content is not None:
+        yield content
+        return
+    start = time.time()
+    parts = []
+    for piece in gateway.chat_stream(messages, model, SITE_PRIORITIES.get(site, PRIORITY_INTERACTIVE), timeout):
+        parts.append(piece)
+        yield piece
+    cache.put(site, key, model, "".join(parts), time.time() - start)
@@ -0,0 +1,200 @@
+import json
+import time
+import queue
+import asyncio
+import hashlib
+import itertools
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+import ollama
+import config
+
+# Lower value = served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 5
+PRIORITY_BACKGROUND = 10
+
+class LLMGateway:
+    """
+    Single entry point to the local Ollama server.
+    - bounded worker pool (max concurrent inferences)
+    - priority queue: UI commands jump ahead of background analysis
+    - identical in-flight requests are coalesced onto one inference
+    - per-call deadlines, with both sync and asyncio entry points
+    """
+
+    def __init__(self, host=None, workers=2, default_timeout=60, keep_alive="30m"):
+        self.client = ollama.Client(host=host, timeout=default_timeout)
+        self.default_timeout = default_timeout
+        self.keep_alive = keep_alive # Sent with every request so the model stays resident
+        self.model_state = {} # model -> cold | warming | warm | error
+        self.last_check = 0
+        self.jobs = queue.PriorityQueue()
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.seq = itertools.count()
+        self.counters = {"requests": 0, "coalesced": 0, "completed": 0, "failed": 0, "expired": 0, "timeouts": 0, "cancelled": 0}
+
+        self.workers = []
+        for i in range(workers):
+            t = threading.Thread(target=self._worker_loop, name=f"llm-worker-{i}", daemon=True)
+            t.start()
+            self.workers.append(t)
+
+    @staticmethod
+    def make_key(model, messages, options=None):
+        raw = json.dumps([model, messages, options], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    # --- SUBMISSION ---
+    def submit(self, messages, model='llama3.2', priority=PRIORITY_NORMAL, timeout=None, options=None):
+        """Queues a chat request and returns a concurrent.futures.Future with the response text."""
+        deadline = time.time() + (timeout or self.default_timeout)
+        key = self.make_key(model, messages, options)
+        with self.lock:
+            self.counters["requests"] += 1
+            job = self.in_flight.get(key)
+            if job:
+                # Same prompt already queued/running: share its result
+                self.counters["coalesced"] += 1
+                job["deadline"] = max(job["deadline"], deadline)
+                if priority < job["priority"] and not job["started"]:
+                    # Re-queue at the more urgent priority; the stale entry is skipped by the workers
+                    job["priority"] = priority
+                    self.jobs.put((priority, next(self.seq), job))
+                return job["future"]
+            job = self._new_job(key, model, messages, options, priority, deadline)
+            self.in_flight[key] = job
+        self.jobs.put((priority, next(self.seq), job))
+        return job["future"]
+
+    @staticmethod
+    def _new_job(key, model, messages, options, priority, deadline, stream=None):
+        return {"key": key, "model": model, "messages": messages, "options": options, "priority": priority,
+                "deadline": deadline, "future": Future(), "stream": stream, "started": False, "cancelled": False}
+
+    def chat(self, messages, model='llama3.2', priority=PRIORITY_NORMAL, timeout=None, options=None):
+        """Blocking call. Raises TimeoutError when the deadline passes."""
+        future = self.submit(messages, model, priority, timeout, options)
+        try:
+            return future.result(timeout=timeout or self.default_timeout)
+        except FutureTimeout:
+            with self.lock: self.counters["timeouts"] += 1
+            raise TimeoutError("LLM request timed out")
+
+    async def achat(self, messages, model='llama3.2', priority=PRIORITY_NORMAL, timeout=None, options=None):
+        """asyncio entry point; does not block the event loop."""
+        future = self.submit(messages, model, priority, timeout, options)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.default_timeout)
+        except asyncio.TimeoutError:
+            with self.lock: self.counters["timeouts"] += 1
+            raise TimeoutError("LLM request timed out")
+
+    def chat_stream(self, messages, model='llama3.2', priority=PRIORITY_NORMAL, timeout=None, options=None):
+        """
+        Yields content chunks. Streams hold one worker slot and are never coalesced.
+        timeout is per chunk (the first one included): a long answer that keeps coming is never cut off.
+        """
+        timeout = timeout or self.default_timeout
+        chunks = queue.Queue()
+        job = self._new_job(None, model, messages, options, priority, time.time() + timeout, stream=chunks)
+        with self.lock: self.counters["requests"] += 1
+        self.jobs.put((priority, next(self.seq), job))
+        try:
+            while True:
+                try:
+                    piece = chunks.get(timeout=timeout)
+                except queue.Empty:
+                    with self.lock: self.counters["timeouts"] += 1
+                    raise TimeoutError("LLM stream timed out")
+                if piece is None: break
+                yield piece
+            job["future"].result() # Re-raises worker errors
+        finally:
+            job["cancelled"] = True # Timed out or the consumer stopped iterating: the worker lets go
+
+    # --- WORKERS ---
+    def _worker_loop(self):
+        while True:
+            _, _, job = self.jobs.get()
+            with self.lock:
+                if job["started"]: continue # Duplicate entry left by a priority upgrade
+                job["started"] = True
+                if job["cancelled"]: continue # Stream abandoned before it reached a worker
+            future = job["future"]
+            try:
+                if time.time() > job["deadline"]:
+                    # Every waiter has already given up, skip the inference entirely
+                    with self.lock: self.counters["expired"] += 1
+                    future.set_exception(TimeoutError("LLM request expired in queue"))
+                    continue
+                kwargs = {"model": job["model"], "messages": job["messages"], "keep_alive": self.keep_alive}
+                if job["options"]: kwargs["options"] = job["options"]
+                if job["stream"] is not None:
+                    response = self.client.chat(stream=True, **kwargs)
+                    for chunk in response:
+                        if job["cancelled"]:
+                            with self.lock: self.counters["cancelled"] += 1
+                            if hasattr(response, "close"): response.close() # Drops the HTTP stream
+                            break
+                        job["stream"].put(chunk['message']['content'])
+                    future.set_result(None)
+                else:
+                    response = self.client.chat(**kwargs)
+                    future.set_result(response['message']['content'])
+                with self.lock: self.counters["completed"] += 1
+            except Exception as e:
+                with self.lock: self.counters["failed"] += 1
+                future.set_exception(e)
+            finally:
+                if job["stream"] is not None: job["stream"].put(None)
+                if job["key"]:
+                    with self.lock: self.in_flight.pop(job["key"], None)
+
+    # --- WARM-UP / KEEP-ALIVE ---
+    def warm_up(self, model='llama3.2'):
+        """Loads the model into memory (empty prompt) and pins it with keep_alive. Blocking."""
+        self.model_state[model] = "warming"
+        try:
+            self.client.generate(model=model, prompt="", keep_alive=self.keep_alive)
+            self.model_state[model] = "warm"
+        except Exception as e:
+            print(f"LLM warm-up error: {e}")
+            self.model_state[model] = "error"
+        return self.model_state[model]
+
+    def start_keep_alive(self, model='llama3.2', interval=60):
+        """Warms the model in the background and re-loads it whenever Ollama has unloaded it."""
+        def loop():
+            self.warm_up(model)
+            while True:
+                time.sleep(interval)
+                if self.model_status(model, max_age=0) == "cold":
+                    self.warm_up(model)
+        threading.Thread(target=loop, name="llm-keep-alive", daemon=True).start()
+
+    def model_status(self, model='llama3.2', max_age=10):
+        """warm/cold as reported by Ollama's loaded-model list (cached for max_age seconds)."""
+        if self.model_state.get(model) == "warming": return "warming"
+        if time.time() - self.last_check >= max_age:
+            self.last_check = time.time()
+            try:
+                loaded = [m.get('model') or m.get('name') or "" for m in self.client.ps()['models']]
+                base = model.split(':')[0]
+                self.model_state[model] = "warm" if any(n.split(':')[0] == base for n in loaded) else "cold"
+            except Exception:
+                self.model_state[model] = "error"
+        return self.model_state.get(model, "cold")
+
+    # --- DIAGNOSTICS ---
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, queued=self.jobs.qsize(), in_flight=len(self.in_flight))
+
+gateway = LLMGateway(
+    host=getattr(config, 'OLLAMA_HOST', None),
+    workers=getattr(config, 'LLM_WORKERS', 2),
+    default_timeout=getattr(config, 'LLM_TIMEOUT', 60),
+    keep_alive=getattr(config, 'OLLAMA_KEEP_ALIVE', "30m"),
+)
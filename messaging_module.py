@@ -8,10 +8,12 @@ import webbrowser
 import pyautogui
 import urllib.parse
 import config
-import ollama
+import llm_cache
+import intent_router
+from candidate_index import select_candidates
 import dateparser
-from telegram import Bot
-from telegram.ext import Application, MessageHandler, filters
+from telegram.ext import MessageHandler, filters
+from telegram_client import TelegramClient
 
 class MessagingAssistant:
     def __init__(self):
@@ -32,10 +34,10 @@ class MessagingAssistant:
         self.scheduler_thread = threading.Thread(target=self._scheduler_loop, daemon=True)
         self.scheduler_thread.start()
         
-        # 2. Telegram Bot Thread
+        # 2. Telegram: one event loop thread + one Application for polling and every send
+        self.telegram = None
         if config.TELEGRAM_BOT_TOKEN and "YOUR_" not in config.TELEGRAM_BOT_TOKEN:
-            self.telegram_thread = threading.Thread(target=self._run_telegram_bot, daemon=True)
-            self.telegram_thread.start()
+            self._start_telegram_bot()
 
     # --- DATA MANAGEMENT ---
     def load_contacts(self):
@@ -69,10 +71,12 @@ class MessagingAssistant:
 
     # --- LLM INTELLIGENCE ---
     def parse_command(self, text):
+        fast = intent_router.match_messaging(text, self.contacts)
+        if fast: return fast
         try:
             prompt = f"""
             Extract messaging details from command: "{text}".
-            Contacts: {[c['name'] for c in self.contacts]}
+            Contacts: {select_candidates(self.contacts, text)}
             
             Return JSON with keys:
             - intent: "send" or "schedule"
@@ -83,8 +87,7 @@ class MessagingAssistant:
             
             Return ONLY JSON.
             """
-            response = ollama.chat(model='llama3.2', messages=[{'role': 'user', 'content': prompt}])
-            content = response['message']['content']
+            content = llm_cache.chat('messaging.parse', [{'role': 'user', 'content': prompt}])
             start, end = content.find('{'), content.rfind('}') + 1
             if start != -1:
                 data = json.loads(content[start:end])
@@ -106,8 +109,7 @@ class MessagingAssistant:
             Return JSON: {{ "sentiment": "positive"|"neutral"|"negative", "emotion": "one_word_label" }}
             ONLY JSON.
             """
-            response = ollama.chat(model='llama3.2', messages=[{'role': 'user', 'content': prompt}])
-            content = response['message']['content']
+            content = llm_cache.chat('messaging.sentiment', [{'role': 'user', 'content': prompt}])
             start, end = content.find('{'), content.rfind('}') + 1
             return json.loads(content[start:end])
         except:
@@ -120,8 +122,7 @@ class MessagingAssistant:
             The sender is feeling {emotion}.
             Return ONLY the reply text.
             """
-            response = ollama.chat(model='llama3.2', messages=[{'role': 'user', 'content': prompt}])
-            return response['message']['content'].strip().replace('"', '')
+            return llm_cache.chat('messaging.reply', [{'role': 'user', 'content': prompt}]).strip().replace('"', '')
         except:
             return "Received."
 
@@ -152,19 +153,13 @@ class MessagingAssistant:
         except Exception as e:
             return False, f"WhatsApp Desktop Error: {e}"
 
-    def send_telegram(self, chat_id, message):
-        if not config.TELEGRAM_BOT_TOKEN:
+    def send_telegram(self, chat_id, message, wait=True):
+        """Sent on the shared bot loop. wait=False returns a concurrent Future instead of (ok, msg)."""
+        if not self.telegram:
             return False, "Telegram Token missing."
-        
-        async def _send():
-            bot = Bot(token=config.TELEGRAM_BOT_TOKEN)
-            await bot.send_message(chat_id=chat_id, text=message)
-        
-        try:
-            asyncio.run(_send())
-            return True, "Telegram message sent."
-        except Exception as e:
-            return False, f"Telegram Error: {e}"
+        if not wait:
+            return self.telegram.send_message(chat_id, message)
+        return self.telegram.send(chat_id, message)
 
     def schedule_message(self, platform, recipient_data, message, time_iso):
         self.scheduled_messages.append({
@@ -195,14 +190,15 @@ class MessagingAssistant:
                         self.save_scheduled()
             time.sleep(60)
 
-    def _run_telegram_bot(self):
+    def _start_telegram_bot(self):
         async def handle_msg(update, context):
             text = update.message.text
             sender_id = str(update.message.chat_id)
             sender_name = update.message.chat.first_name
             
-            analysis = self.analyze_sentiment(text)
-            reply = self.generate_reply(text, analysis['emotion'])
+            # LLM calls run on the gateway's background queue; don't block the bot's event loop
+            analysis = await asyncio.to_thread(self.analyze_sentiment, text)
+            reply = await asyncio.to_thread(self.generate_reply, text, analysis['emotion'])
             
             log_entry = {
                 "platform": "telegram",
@@ -235,8 +231,11 @@ class MessagingAssistant:
                 })
 
         try:
-            app = Application.builder().token(config.TELEGRAM_BOT_TOKEN).build()
-            app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_msg))
-            app.run_polling()
+            self.telegram = TelegramClient(
+                config.TELEGRAM_BOT_TOKEN,
+                handlers=[MessageHandler(filters.TEXT & ~filters.COMMAND, handle_msg)],
+                pool_size=getattr(config, 'TELEGRAM_POOL_SIZE', 8),
+            )
+            self.telegram.start()
         except Exception as e:
             print(f"Bot Polling Error: {e}")
\ No newline at end of file
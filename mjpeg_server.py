@@ -0,0 +1,114 @@
+import re
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BOUNDARY = "armorframe"
+
+class MJPEGServer:
+    """
+    Local HTTP endpoint for the live camera previews:
+      /stream/<cam_id>    multipart/x-mixed-replace MJPEG (what the UI's <img> tag points at)
+      /snapshot/<cam_id>  the latest JPEG once
+    source(cam_id) returns (seq, jpeg bytes) or None when that camera is not running.
+    Frames arrive already JPEG-encoded (once, in the camera process); every viewer is sent
+    the same bytes, so extra viewers cost a socket write, not an encode.
+    """
+
+    def __init__(self, source, host="127.0.0.1", port=8765, fps=15, public_host=None):
+        self.source = source
+        self.host = host
+        self.port = port
+        self.public_host = public_host or ("localhost" if host in ("127.0.0.1", "0.0.0.0") else host)
+        self.interval = 1.0 / fps
+        self.server = None
+        self.viewers = 0
+        self.frames_sent = 0
+        self.lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self.server is not None
+
+    def start(self):
+        if self.running: return True
+        try:
+            self.server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        except OSError as e:
+            print(f"Stream Server Error: {e}")
+            return False
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1] # Resolved when port=0
+        threading.Thread(target=self.server.serve_forever, name="mjpeg-server", daemon=True).start()
+        return True
+
+    def stop(self):
+        if not self.running: return
+        self.server.shutdown()
+        self.server.server_close()
+        self.server = None
+
+    def url(self, cam_id=0):
+        return f"http://{self.public_host}:{self.port}/stream/{cam_id}" if self.running else None
+
+    def stats(self):
+        return {"viewers": self.viewers, "frames_sent": self.frames_sent}
+
+    def _handler(self):
+        owner = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                m = re.fullmatch(r"/(stream|snapshot)/(\d+)", self.path.split("?")[0])
+                if not m:
+                    self.send_error(404)
+                    return
+                cam_id = int(m.group(2))
+                if m.group(1) == "snapshot":
+                    self._snapshot(cam_id)
+                else:
+                    self._stream(cam_id)
+
+            def _snapshot(self, cam_id):
+                latest = owner.source(cam_id)
+                if not latest or latest[1] is None:
+                    self.send_error(503, "No frame yet")
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(latest[1])))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(latest[1])
+
+            def _stream(self, cam_id):
+                if owner.source(cam_id) is None:
+                    self.send_error(404, "Camera not running")
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                with owner.lock: owner.viewers += 1
+                last_seq = 0
+                try:
+                    while owner.running:
+                        latest = owner.source(cam_id)
+                        if latest is None: break # Surveillance stopped: end the response
+                        seq, data = latest
+                        if data is not None and seq != last_seq:
+                            last_seq = seq
+                            self.wfile.write(f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                                             f"Content-Length: {len(data)}\r\n\r\n".encode() + data + b"\r\n")
+                            self.wfile.flush()
+                            with owner.lock: owner.frames_sent += 1
+                        time.sleep(owner.interval)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass # Viewer closed the tab / Streamlit rerendered the page
+                finally:
+                    with owner.lock: owner.viewers -= 1
+
+        return Handler
@@ -0,0 +1,105 @@
+import time
+import cv2
+import numpy as np
+
+class MotionDetector:
+    """
+    Cheap motion detection for the surveillance loop.
+    - analysis runs on a downscaled grayscale copy (analysis_width px wide)
+    - adaptive background model (MOG2 / KNN), or the old two-frame diff
+    - optional ROI / ignore zones: polygons in normalised (0..1) coordinates
+    - RETR_EXTERNAL contours; boxes are returned in full-resolution pixels
+    """
+
+    def __init__(self, analysis_width=320, method="mog2", min_area=5000, roi=None, ignore=None,
+                 history=300, var_threshold=25, learning_rate=-1, warmup_frames=25):
+        self.analysis_width = analysis_width
+        self.method = method
+        self.min_area = min_area # Full-resolution pixels, same unit as the old sensitivity slider
+        self.roi = roi or [] # [[(x, y), ...], ...] areas to watch (empty = whole frame)
+        self.ignore = ignore or [] # Areas that never trigger (trees, screens, windows)
+        self.history = history
+        self.var_threshold = var_threshold
+        self.learning_rate = learning_rate
+        self.warmup_frames = warmup_frames
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+        self.timing = {"frames": 0, "avg_ms": 0.0}
+        self.reset()
+
+    def reset(self):
+        """Drops the background model (camera restarted or moved)."""
+        if self.method == "knn":
+            self.subtractor = cv2.createBackgroundSubtractorKNN(history=self.history, detectShadows=False)
+        elif self.method == "mog2":
+            self.subtractor = cv2.createBackgroundSubtractorMOG2(history=self.history, varThreshold=self.var_threshold,
+                                                                 detectShadows=False)
+        else:
+            self.subtractor = None
+        self.prev = None
+        self.mask = None
+        self.mask_shape = None
+        self.frames_seen = 0
+
+    def set_zones(self, roi=None, ignore=None):
+        self.roi = roi or []
+        self.ignore = ignore or []
+        self.mask_shape = None # Rebuilt on the next frame
+
+    def _zone_mask(self, shape):
+        """uint8 mask (255 = analysed) at analysis size, or None when every pixel counts."""
+        if shape == self.mask_shape: return self.mask
+        self.mask_shape = shape
+        if not self.roi and not self.ignore:
+            self.mask = None
+            return None
+        h, w = shape
+        scale = np.array([w, h], dtype=np.float32)
+        mask = np.zeros(shape, np.uint8) if self.roi else np.full(shape, 255, np.uint8)
+        for poly in self.roi:
+            cv2.fillPoly(mask, [(np.array(poly, np.float32) * scale).astype(np.int32)], 255)
+        for poly in self.ignore:
+            cv2.fillPoly(mask, [(np.array(poly, np.float32) * scale).astype(np.int32)], 0)
+        self.mask = mask
+        return mask
+
+    def detect(self, frame):
+        """Returns [(x, y, w, h), ...] of moving regions in frame coordinates."""
+        start = time.perf_counter()
+        full_h, full_w = frame.shape[:2]
+        scale = min(1.0, self.analysis_width / float(full_w))
+        small = cv2.resize(frame, (int(full_w * scale), int(full_h * scale)), interpolation=cv2.INTER_LINEAR) if scale < 1 else frame
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+
+        if self.subtractor is not None:
+            fg = self.subtractor.apply(gray, learningRate=self.learning_rate)
+        else:
+            gray = cv2.GaussianBlur(gray, (5, 5), 0)
+            fg = cv2.absdiff(gray, self.prev) if self.prev is not None else np.zeros_like(gray)
+            self.prev = gray
+            _, fg = cv2.threshold(fg, 20, 255, cv2.THRESH_BINARY)
+
+        mask = self._zone_mask(gray.shape)
+        if mask is not None: fg = cv2.bitwise_and(fg, mask)
+        fg = cv2.morphologyEx(fg, cv2.MORPH_OPEN, self.kernel) # Sensor noise / single-pixel flicker
+        fg = cv2.dilate(fg, self.kernel, iterations=2)
+        contours, _ = cv2.findContours(fg, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        self.frames_seen += 1
+        boxes = []
+        if self.frames_seen > self.warmup_frames: # Background model is still learning the scene before this
+            min_area = self.min_area * scale * scale
+            inv = 1.0 / scale
+            for contour in contours:
+                if cv2.contourArea(contour) < min_area: continue
+                x, y, w, h = cv2.boundingRect(contour)
+                boxes.append((int(x * inv), int(y * inv), int(w * inv), int(h * inv)))
+
+        elapsed = (time.perf_counter() - start) * 1000
+        self.timing["frames"] += 1
+        self.timing["avg_ms"] = elapsed if self.timing["frames"] == 1 else 0.9 * self.timing["avg_ms"] + 0.1 * elapsed
+        return boxes
+
+def draw_boxes(frame, boxes, color=(0, 0, 255)):
+    for x, y, w, h in boxes:
+        cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
+    return frame
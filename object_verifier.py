@@ -0,0 +1,104 @@
+import os
+import time
+from abc import ABC, abstractmethod
+import cv2
+import numpy as np
+
+class Verifier(ABC):
+    """
+    Second stage behind motion detection: looks only inside motion boxes of motion-positive
+    frames and returns the boxes that really contain a person / wanted object.
+    """
+
+    def __init__(self, margin=0.25, min_score=0.5):
+        self.margin = margin # Motion boxes are grown by this fraction: contours often cut limbs off
+        self.min_score = min_score
+        self.timing = {"calls": 0, "hits": 0, "avg_ms": 0.0}
+
+    def _crops(self, frame, boxes):
+        fh, fw = frame.shape[:2]
+        for x, y, w, h in boxes:
+            mx, my = int(w * self.margin), int(h * self.margin)
+            x0, y0 = max(0, x - mx), max(0, y - my)
+            x1, y1 = min(fw, x + w + mx), min(fh, y + h + my)
+            if x1 - x0 > 8 and y1 - y0 > 8: yield x0, y0, frame[y0:y1, x0:x1]
+
+    @abstractmethod
+    def detect(self, crop):
+        """[(x, y, w, h)] inside crop."""
+
+    def verify(self, frame, boxes):
+        start = time.perf_counter()
+        found = []
+        for x0, y0, crop in self._crops(frame, boxes):
+            found += [(x0 + x, y0 + y, w, h) for x, y, w, h in self.detect(crop)]
+        elapsed = (time.perf_counter() - start) * 1000
+        self.timing["calls"] += 1
+        self.timing["hits"] += bool(found)
+        self.timing["avg_ms"] = elapsed if self.timing["calls"] == 1 else 0.9 * self.timing["avg_ms"] + 0.1 * elapsed
+        return found
+
+class HOGVerifier(Verifier):
+    """OpenCV's built-in HOG + linear SVM people detector (no model files, CPU only)."""
+
+    def __init__(self, max_side=400, **kwargs):
+        super().__init__(**kwargs)
+        self.max_side = max_side # Crops are scaled into 128 px (window height) .. max_side
+        self.hog = cv2.HOGDescriptor()
+        self.hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
+
+    def detect(self, crop):
+        h, w = crop.shape[:2]
+        scale = min(self.max_side / float(max(h, w)), 3.0)
+        if h * scale < 128: scale = 128.0 / h # A person must fill at least one 64x128 window
+        if scale > 4 or w * scale < 64: return [] # Too small to tell anything
+        if scale != 1.0: crop = cv2.resize(crop, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_LINEAR)
+        rects, weights = self.hog.detectMultiScale(crop, winStride=(8, 8), padding=(8, 8), scale=1.05)
+        return [tuple(int(v / scale) for v in r) for r, s in zip(rects, np.ravel(weights)) if s >= self.min_score]
+
+class DNNVerifier(Verifier):
+    """
+    Any SSD-style detector OpenCV's dnn module can load (e.g. MobileNet-SSD Caffe), run on the CPU.
+    classes: label ids that count (15 = person in the 20-class VOC MobileNet-SSD).
+    """
+
+    def __init__(self, model, config=None, classes=(15,), input_size=300, mean=127.5, scale=1 / 127.5, **kwargs):
+        super().__init__(**kwargs)
+        self.net = cv2.dnn.readNet(model, config or "")
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        self.classes = set(classes)
+        self.input_size = input_size
+        self.mean = mean
+        self.scale = scale
+
+    def detect(self, crop):
+        h, w = crop.shape[:2]
+        blob = cv2.dnn.blobFromImage(crop, self.scale, (self.input_size, self.input_size), self.mean)
+        self.net.setInput(blob)
+        found = []
+        for det in self.net.forward().reshape(-1, 7): # [image, label, score, x0, y0, x1, y1] normalised
+            if det[2] < self.min_score or int(det[1]) not in self.classes: continue
+            x0, y0, x1, y1 = (det[3:7] * [w, h, w, h]).astype(int)
+            found.append((x0, y0, x1 - x0, y1 - y0))
+        return found
+
+def make_verifier(settings):
+    """Verifier from the camera settings ("verify": None / "hog" / "dnn"); None if disabled or unusable."""
+    kind = settings.get("verify")
+    try:
+        if kind == "hog":
+            if not hasattr(cv2, "HOGDescriptor"):
+                print("Verifier Error: this OpenCV build has no HOG people detector (gone in 5.x), use 'dnn'")
+                return None
+            return HOGVerifier(min_score=settings.get("verify_score", 0.5))
+        if kind == "dnn":
+            model = settings.get("verify_model")
+            if not model or not os.path.exists(model):
+                print(f"Verifier Error: model file {model!r} not found, verification disabled")
+                return None
+            return DNNVerifier(model, settings.get("verify_config"), classes=settings.get("verify_classes") or (15,),
+                               min_score=settings.get("verify_score", 0.5))
+    except Exception as e:
+        print(f"Verifier Error: {e}")
+    return None
@@ -0,0 +1,132 @@
+import os
+import sys
+import time
+import wave
+import hashlib
+import threading
+import subprocess
+
+# Fixed phrases rendered at startup so their first use is already instant.
+DEFAULT_PREWARM = [
+    "Motion detected in secure sector.",
+    "Song not found.",
+    "Command not recognized.",
+    "Contact not found.",
+    "Opening google.",
+    "Opening youtube.",
+]
+
+class PhraseCache:
+    """
+    Content-addressed WAV files for recurring utterances, keyed on (text, voice, rate).
+    Files live in one directory; last use is the file mtime, so the LRU order survives restarts.
+    """
+
+    def __init__(self, directory="tts_cache", max_bytes=50 * 1024 * 1024, min_uses=2):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.min_uses = min_uses # A phrase is rendered once it has been spoken this many times
+        self.uses = {}
+        self.lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "rendered": 0, "evicted": 0}
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def normalize(text):
+        return " ".join(text.split())
+
+    def path_for(self, text, voice, rate):
+        raw = f"{voice}\x00{rate}\x00{self.normalize(text)}"
+        return os.path.join(self.directory, hashlib.sha256(raw.encode('utf-8')).hexdigest() + ".wav")
+
+    def get(self, text, voice, rate):
+        """Path of the cached WAV or None. Counts the use towards min_uses."""
+        path = self.path_for(text, voice, rate)
+        with self.lock:
+            self.uses[path] = self.uses.get(path, 0) + 1
+            if len(self.uses) > 10000: self.uses.clear() # Only recurring phrases matter
+        if os.path.exists(path):
+            try: os.utime(path) # Touch for LRU
+            except OSError: pass
+            self.counters["hits"] += 1
+            return path
+        self.counters["misses"] += 1
+        return None
+
+    def wants(self, text, voice, rate):
+        path = self.path_for(text, voice, rate)
+        return self.uses.get(path, 0) >= self.min_uses and not os.path.exists(path)
+
+    def render(self, engine, text, voice, rate, cancelled=None):
+        """
+        Synthesises text to the cache with the caller's engine (must run on the engine's thread).
+        cancelled() is asked after the run: True means the caller stopped the engine midway, nothing is kept.
+        """
+        path = self.path_for(text, voice, rate)
+        if os.path.exists(path): return path
+        tmp = f"{path}.{os.getpid()}.tmp.wav"
+        try:
+            engine.save_to_file(text, tmp)
+            engine.runAndWait()
+            if cancelled and cancelled():
+                if os.path.exists(tmp): os.remove(tmp)
+                return None
+            if not os.path.getsize(tmp): raise OSError("empty render")
+            os.replace(tmp, path) # Atomic: a half-written file is never played
+            self.counters["rendered"] += 1
+        except Exception as e:
+            print(f"Phrase Cache Error: {e}")
+            if os.path.exists(tmp): os.remove(tmp)
+            return None
+        self.evict()
+        return path
+
+    def evict(self):
+        """Drops least recently used files until the directory fits in max_bytes."""
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".wav") or ".tmp" in name: continue
+            st = os.stat(os.path.join(self.directory, name))
+            files.append((st.st_mtime, st.st_size, name))
+        total = sum(f[1] for f in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_bytes: break
+            try:
+                os.remove(os.path.join(self.directory, name))
+                total -= size
+                self.counters["evicted"] += 1
+            except OSError: pass
+
+    def stats(self):
+        files = [f for f in os.listdir(self.directory) if f.endswith(".wav")]
+        size = sum(os.path.getsize(os.path.join(self.directory, f)) for f in files)
+        return dict(self.counters, files=len(files), mb=round(size / 1024 / 1024, 1))
+
+# --- PLAYBACK ---
+def wav_duration(path):
+    with wave.open(path, 'rb') as w:
+        return w.getnframes() / float(w.getframerate() or 1)
+
+def play_wav(path, interrupted=lambda: False):
+    """Plays a WAV file, polling interrupted() to stop early. Returns False if nothing could play it."""
+    if sys.platform == 'win32':
+        import winsound
+        winsound.PlaySound(path, winsound.SND_FILENAME | winsound.SND_ASYNC)
+        end = time.time() + wav_duration(path)
+        while time.time() < end:
+            if interrupted():
+                winsound.PlaySound(None, 0)
+                break
+            time.sleep(0.02)
+        return True
+    player = ['afplay', path] if sys.platform == 'darwin' else ['aplay', '-q', path]
+    try:
+        proc = subprocess.Popen(player, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError:
+        return False
+    while proc.poll() is None:
+        if interrupted():
+            proc.terminate()
+            break
+        time.sleep(0.02)
+    return True
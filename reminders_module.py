@@ -4,8 +4,9 @@ import time
 import threading
 import datetime
 import dateparser
-import ollama
-import pyttsx3
+import llm_cache
+import intent_router
+from tts_service import tts, PRIORITY_REMINDER
 import config
 
 class RemindersAssistant:
@@ -19,9 +20,6 @@ class RemindersAssistant:
         self.shopping_list = self.load_data(self.shopping_file)
         self.todo_list = self.load_data(self.todo_file)
         
-        # TTS Engine for background alerts
-        self.engine = None 
-        
         # Start Background Scheduler
         self.running = True
         self.scheduler_thread = threading.Thread(target=self._scheduler_loop, daemon=True)
@@ -112,6 +110,8 @@ class RemindersAssistant:
     # --- LLM PARSING ---
     def parse_command(self, text):
         """Uses Ollama to determine if it's a reminder, todo, or shopping item."""
+        fast = intent_router.match_reminder(text)
+        if fast: return fast
         try:
             prompt = f"""
             Analyze command: "{text}"
@@ -129,8 +129,7 @@ class RemindersAssistant:
             
             Return ONLY JSON.
             """
-            response = ollama.chat(model='llama3.2', messages=[{'role': 'user', 'content': prompt}])
-            content = response['message']['content']
+            content = llm_cache.chat('reminders.parse', [{'role': 'user', 'content': prompt}])
             start, end = content.find('{'), content.rfind('}') + 1
             if start != -1:
                 return json.loads(content[start:end])
@@ -141,14 +140,8 @@ class RemindersAssistant:
 
     # --- BACKGROUND WORKER ---
     def _speak_alert(self, text):
-        """Thread-safe TTS trigger"""
-        try:
-            # Re-init engine inside thread to avoid conflicts
-            engine = pyttsx3.init()
-            engine.say(text)
-            engine.runAndWait()
-        except:
-            pass
+        """Non-blocking TTS trigger (shared speech service)"""
+        tts.say(text, PRIORITY_REMINDER)
 
     def _scheduler_loop(self):
         """Checks for due reminders every 10 seconds."""
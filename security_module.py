@@ -1,12 +1,18 @@
-import cv2
 import threading
-import time
 import json
 import os
 import datetime
-import pyttsx3
-import ollama
+from tts_service import tts, PRIORITY_SECURITY
+import llm_cache
+import intent_router
 import config
+from alert_dispatcher import AlertDispatcher
+from camera_manager import CameraManager
+from event_store import EventStore
+from thumbnail_cache import ThumbnailCache
+from mjpeg_server import MJPEGServer
+from image_hash import dhash, NearDuplicateFilter
+from capture_retention import CaptureRetention
 
 class SecuritySystem:
     def __init__(self):
@@ -19,133 +25,198 @@ class SecuritySystem:
         self.capture_dir = config.SECURITY_CAPTURES_DIR
         if not os.path.exists(self.capture_dir):
             os.makedirs(self.capture_dir)
+        # Indexed event log; security_log.json is imported once on first start
+        self.events = EventStore(
+            getattr(config, 'SECURITY_EVENTS_DB', "security_events.db"),
+            legacy_json=self.log_file,
+            retention_days=getattr(config, 'SECURITY_RETENTION_DAYS', None),
+            max_events=getattr(config, 'SECURITY_MAX_EVENTS', None),
+        )
+        self.thumbs = ThumbnailCache(self.capture_dir, width=getattr(config, 'SECURITY_THUMB_WIDTH', 320))
+        self.thumbs.backfill()
+        # Disk budget + retention in the background; near-identical captures are not written twice
+        self.retention = CaptureRetention(
+            self.capture_dir, self.events, self.thumbs,
+            max_mb=getattr(config, 'SECURITY_DISK_BUDGET_MB', 2048),
+            recompress_days=getattr(config, 'SECURITY_RECOMPRESS_DAYS', None),
+            recompress_quality=getattr(config, 'SECURITY_RECOMPRESS_QUALITY', 60),
+            interval_s=getattr(config, 'SECURITY_RETENTION_INTERVAL_S', 600),
+        )
+        self.retention.start()
+        self.dedup = NearDuplicateFilter(
+            window_s=getattr(config, 'SECURITY_DEDUP_WINDOW_S', 300),
+            max_distance=getattr(config, 'SECURITY_DEDUP_DISTANCE', 6),
+        )
             
         # State
-        self.latest_frame = None
         self.last_motion_time = 0
         self.is_recording = False
-        self.alert_cooldown = 0
         
         # Settings
-        self.sensitivity = 5000  # Lower = more sensitive
         self.alert_tts = True
         self.alert_email = False
         self.alert_telegram = False
         
+        # Cameras: each one runs capture + motion detection in its own process (see camera_manager.py)
+        self.cameras = CameraManager(
+            getattr(config, 'SECURITY_CAMERAS', [self.camera_index]),
+            {
+                "analysis_width": getattr(config, 'SECURITY_ANALYSIS_WIDTH', 320),
+                "bg_method": getattr(config, 'SECURITY_BG_METHOD', "mog2"),
+                "roi": getattr(config, 'SECURITY_ROI', None),
+                "ignore": getattr(config, 'SECURITY_IGNORE_ZONES', None),
+                "ring_slots": getattr(config, 'SECURITY_RING_SLOTS', 4),
+                # Adaptive rate: idle until motion / a scene change, armed until quiet_s without either
+                "adaptive": getattr(config, 'SECURITY_ADAPTIVE', True),
+                "idle_fps": getattr(config, 'SECURITY_IDLE_FPS', 2),
+                "idle_width": getattr(config, 'SECURITY_IDLE_WIDTH', 160),
+                "armed_fps": getattr(config, 'SECURITY_ARMED_FPS', 15),
+                "quiet_s": getattr(config, 'SECURITY_QUIET_S', 15),
+                "scene_change": getattr(config, 'SECURITY_SCENE_CHANGE', 12.0),
+                # Second stage run only inside motion boxes: None, "hog" (built-in people detector) or "dnn"
+                "verify": getattr(config, 'SECURITY_VERIFY', None),
+                "verify_model": getattr(config, 'SECURITY_VERIFY_MODEL', None),
+                "verify_config": getattr(config, 'SECURITY_VERIFY_CONFIG', None),
+                "verify_classes": getattr(config, 'SECURITY_VERIFY_CLASSES', None),
+                "verify_score": getattr(config, 'SECURITY_VERIFY_SCORE', 0.5),
+                "verify_fps": getattr(config, 'SECURITY_VERIFY_FPS', 4),
+                "verify_hold_s": getattr(config, 'SECURITY_VERIFY_HOLD_S', 3),
+                "cooldown": getattr(config, 'SECURITY_ALERT_COOLDOWN', 10),
+                "preview_width": getattr(config, 'SECURITY_PREVIEW_WIDTH', 640),
+                "preview_fps": getattr(config, 'SECURITY_PREVIEW_FPS', 15),
+                "preview_quality": getattr(config, 'SECURITY_PREVIEW_QUALITY', 70),
+                # Pre/post-event clips from an in-memory JPEG ring
+                "clips": getattr(config, 'SECURITY_CLIPS', True),
+                "clip_pre_s": getattr(config, 'SECURITY_CLIP_PRE_S', 5),
+                "clip_post_s": getattr(config, 'SECURITY_CLIP_POST_S', 5),
+                "clip_fps": getattr(config, 'SECURITY_CLIP_FPS', 10),
+                "clip_buffer_mb": getattr(config, 'SECURITY_CLIP_BUFFER_MB', 64),
+                "capture_dir": self.capture_dir,
+            },
+            on_event=self._on_camera_event,
+        )
+        # Live feed: MJPEG over local HTTP, started with the first activation and kept up afterwards
+        self.stream = MJPEGServer(
+            self.cameras.latest_jpeg,
+            host=getattr(config, 'SECURITY_STREAM_HOST', "127.0.0.1"),
+            port=getattr(config, 'SECURITY_STREAM_PORT', 8765),
+            fps=getattr(config, 'SECURITY_PREVIEW_FPS', 15),
+            public_host=getattr(config, 'SECURITY_STREAM_PUBLIC_HOST', None),
+        )
+        
         # Dependencies (Injected later)
         self.email_bot = None
         self.msg_bot = None
+        
+        # Alert delivery: one background worker per channel, so detection never waits on I/O
+        self.alerts = AlertDispatcher(queue_size=getattr(config, 'SECURITY_ALERT_QUEUE', 16))
+        self.alerts.add_channel("evidence", self._save_evidence, retries=2, backoff=0.5)
+        self.alerts.add_channel("voice", lambda e: self.speak_alert("Motion detected in secure sector."), enabled=lambda: self.alert_tts, retries=0)
+        self.alerts.add_channel("email", self._send_email_alert, enabled=lambda: self.alert_email and self.email_bot)
+        self.alerts.add_channel("telegram", self._send_telegram_alert, enabled=lambda: self.alert_telegram and self.msg_bot)
 
-    def load_logs(self):
-        if not os.path.exists(self.log_file): return []
-        try:
-            with open(self.log_file, 'r') as f: return json.load(f)
-        except: return []
-
-    def log_event(self, event_type, filename):
-        logs = self.load_logs()
-        entry = {
-            "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "event": event_type,
-            "file": filename
-        }
-        logs.insert(0, entry)
-        with open(self.log_file, 'w') as f:
-            json.dump(logs, f, indent=4)
+    @property
+    def sensitivity(self):
+        """Minimum motion area in pixels (lower = more sensitive), shared with the camera processes."""
+        return self.cameras.sensitivity.value
+
+    @sensitivity.setter
+    def sensitivity(self, value):
+        self.cameras.sensitivity.value = int(value)
+
+    def load_logs(self, limit=50, offset=0, start=None, end=None, event=None, camera=None):
+        """Newest-first page of the event log (see EventStore.query)."""
+        return self.events.query(start, end, event, camera, limit, offset)
+
+    def log_event(self, event_type, filename, when=None, camera=None):
+        # Called from background workers only, so the thumbnail is ready before the gallery asks
+        self.thumbs.make(filename)
+        self.events.append(event_type, filename, when, camera)
+
+    def apply_retention(self):
+        """Runs the retention job now (it also runs every SECURITY_RETENTION_INTERVAL_S). Returns its stats."""
+        return self.retention.run_once()
 
     def speak_alert(self, text):
-        """Thread-safe TTS"""
+        """Non-blocking; alerts jump ahead of (and interrupt) everything else being spoken"""
         if not self.alert_tts: return
-        try:
-            engine = pyttsx3.init()
-            engine.say(text)
-            engine.runAndWait()
-        except: pass
-
-    def send_remote_alerts(self, msg):
-        # Email
-        if self.alert_email and self.email_bot:
-            # We assume a default contact or configured admin email
-            admin_email = config.EMAIL_SENDER_ADDRESS # Send to self
-            self.email_bot.send_email(admin_email, "SECURITY ALERT", msg)
-        
-        # Telegram
-        if self.alert_telegram and self.msg_bot and self.msg_bot.contacts:
-            # Send to first contact with telegram_id as admin
-            for c in self.msg_bot.contacts:
-                if c.get('telegram_id'):
-                    self.msg_bot.send_telegram(c['telegram_id'], f"🚨 {msg}")
-                    break
+        tts.say(text, PRIORITY_SECURITY)
+
+    # --- ALERT CHANNELS (run on the dispatcher's workers) ---
+    def _send_email_alert(self, event):
+        # We assume a default contact or configured admin email
+        admin_email = config.EMAIL_SENDER_ADDRESS # Send to self
+        return self.email_bot.send_email(admin_email, "SECURITY ALERT", event["message"])
+
+    def _send_telegram_alert(self, event):
+        # Send to first contact with telegram_id as admin
+        for c in self.msg_bot.contacts:
+            if c.get('telegram_id'):
+                return self.msg_bot.send_telegram(c['telegram_id'], f"🚨 {event['message']}")
+        return False, "No Telegram admin contact."
+
+    def _save_evidence(self, event):
+        image_hash = dhash(event["jpeg"])
+        # Captures evicted by the disk budget (or deleted) are forgotten, so this one gets written again
+        previous = self.dedup.match(event["cam_id"], image_hash, valid=lambda name: os.path.exists(os.path.join(self.capture_dir, name)))
+        if previous:
+            # Same scene as a capture moments ago: the event points at that file instead of a new copy
+            self.log_event("Motion Detected", previous, event["time"], event["camera"])
+            return
+        # Already JPEG-encoded by the camera process: written as-is
+        filename = f"capture_{event['time'].strftime('%Y%m%d_%H%M%S')}_cam{event['cam_id']}.jpg"
+        with open(os.path.join(self.capture_dir, filename), 'wb') as f:
+            f.write(event["jpeg"])
+        self.thumbs.make(filename, event["jpeg"]) # From the bytes in hand, no re-read
+        self.dedup.add(event["cam_id"], image_hash, filename)
+        self.log_event("Motion Detected", filename, event["time"], event["camera"])
 
     def start_surveillance(self):
         if self.active: return "Security Protocol already active."
+        if not self.cameras.start(): return "Cameras are still shutting down. Try again in a few seconds."
         self.active = True
-        self.thread = threading.Thread(target=self._surveillance_loop, daemon=True)
-        self.thread.start()
-        return "Security Protocol Initiated. Monitoring webcam."
+        self.stream.start()
+        n = len(self.cameras.cameras)
+        return "Security Protocol Initiated. Monitoring webcam." if n == 1 else f"Security Protocol Initiated. Monitoring {n} cameras."
 
     def stop_surveillance(self):
         self.active = False
+        self.cameras.stop()
         return "Security Protocol Deactivated."
 
-    def _surveillance_loop(self):
-        cap = cv2.VideoCapture(self.camera_index)
-        
-        # Baseline frame for motion
-        ret, frame1 = cap.read()
-        ret, frame2 = cap.read()
-        
-        while self.active and cap.isOpened():
-            # 1. Processing
-            diff = cv2.absdiff(frame1, frame2)
-            gray = cv2.cvtColor(diff, cv2.COLOR_BGR2GRAY)
-            blur = cv2.GaussianBlur(gray, (5, 5), 0)
-            _, thresh = cv2.threshold(blur, 20, 255, cv2.THRESH_BINARY)
-            dilated = cv2.dilate(thresh, None, iterations=3)
-            contours, _ = cv2.findContours(dilated, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
-            
-            motion_detected = False
-            for contour in contours:
-                if cv2.contourArea(contour) < self.sensitivity:
-                    continue
-                motion_detected = True
-                x, y, w, h = cv2.boundingRect(contour)
-                cv2.rectangle(frame1, (x, y), (x+w, y+h), (0, 0, 255), 2)
-
-            # 2. Update shared frame for UI
-            with self.lock:
-                self.latest_frame = cv2.cvtColor(frame1, cv2.COLOR_BGR2RGB)
-
-            # 3. Alert Logic
-            if motion_detected:
-                now = time.time()
-                if now - self.alert_cooldown > 10: # 10 sec cooldown
-                    self.alert_cooldown = now
-                    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                    
-                    # Alert
-                    self.speak_alert("Motion detected in secure sector.")
-                    self.send_remote_alerts(f"Motion detected at {timestamp}")
-                    
-                    # Save Evidence
-                    filename = f"capture_{timestamp}.jpg"
-                    filepath = os.path.join(self.capture_dir, filename)
-                    cv2.imwrite(filepath, frame1)
-                    self.log_event("Motion Detected", filename)
-
-            # 4. Cycle Frames
-            frame1 = frame2
-            ret, frame2 = cap.read()
-            if not ret: break
-            
-            # CPU Optimization sleep
-            time.sleep(0.05)
+    # --- CAMERA EVENTS (camera processes -> alert dispatcher) ---
+    def _on_camera_event(self, kind, cam_id, a, b):
+        name = self.cameras.name(cam_id)
+        if kind == "motion":
+            when = datetime.datetime.fromtimestamp(a)
+            self.alerts.dispatch({
+                "cam_id": cam_id, "camera": name, "time": when, "jpeg": b,
+                "message": f"Motion detected on {name} at {when.strftime('%Y%m%d_%H%M%S')}",
+            })
+        elif kind == "clip":
+            self.log_event("Motion Clip", os.path.basename(a), datetime.datetime.fromtimestamp(b), name)
+        if not self.cameras.running: self.active = False # Every camera went away
 
-        cap.release()
-        self.active = False
+    @property
+    def frame_stats(self):
+        return self.cameras.stats()
+
+    @property
+    def latest_frame(self):
+        """RGB preview of the first camera (see frame_for for the others)."""
+        return self.cameras.latest_frame(0)
+
+    def frame_for(self, cam_id):
+        return self.cameras.latest_frame(cam_id)
+
+    def stream_url(self, cam_id=0):
+        """MJPEG URL for the UI, or None if the stream server could not start (port taken)."""
+        return self.stream.url(cam_id)
 
     # --- LLM Parsing ---
     def parse_security_command(self, text):
+        fast = intent_router.match_security(text)
+        if fast: return fast
         try:
             prompt = f"""
             Analyze security command: "{text}"
@@ -155,8 +226,7 @@ class SecuritySystem:
                 "setting_value": "high/low" | "on/off" (optional)
             }}
             """
-            response = ollama.chat(model='llama3.2', messages=[{'role': 'user', 'content': prompt}])
-            content = response['message']['content']
+            content = llm_cache.chat('security.parse', [{'role': 'user', 'content': prompt}])
             start, end = content.find('{'), content.rfind('}') + 1
             return json.loads(content[start:end])
         except: return None
\ No newline at end of file
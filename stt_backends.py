@@ -0,0 +1,157 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import speech_recognition as sr
+import config
+
+# --- ENGINES ---
+class STTBackend:
+    """One speech-to-text engine. recognize(audio) -> (text, confidence); raises sr.RequestError when unavailable."""
+    name = "base"
+    offline = False
+
+    def __init__(self, timeout=5.0, confidence=0.8):
+        self.recognizer = sr.Recognizer() # One per engine: Recognizer is not thread-safe
+        self.recognizer.operation_timeout = timeout
+        self.confidence = confidence # Used when the engine reports no score of its own
+
+    def recognize(self, audio):
+        raise NotImplementedError
+
+class GoogleBackend(STTBackend):
+    """Free Google Web Speech API (network)."""
+    name = "google"
+
+    def recognize(self, audio):
+        result = self.recognizer.recognize_google(audio, show_all=True)
+        alternatives = result.get('alternative') if isinstance(result, dict) else None
+        if not alternatives: raise sr.UnknownValueError()
+        best = alternatives[0]
+        return best['transcript'], best.get('confidence', self.confidence)
+
+class SphinxBackend(STTBackend):
+    """CMU PocketSphinx, fully offline. Less accurate, so it reports a lower default confidence."""
+    name = "sphinx"
+    offline = True
+
+    def __init__(self, timeout=5.0, confidence=0.5):
+        super().__init__(timeout, confidence)
+
+    def recognize(self, audio):
+        return self.recognizer.recognize_sphinx(audio), self.confidence
+
+BACKENDS = {"google": GoogleBackend, "sphinx": SphinxBackend}
+
+# --- SELECTION ---
+class SpeechToText:
+    """
+    Runs a set of STT engines behind one transcribe() call.
+    - engines are ranked by health, then by their moving-average latency
+    - parallel mode starts every engine at once and returns the first confident result
+    - sequential mode falls back to the next engine when one fails or exceeds fallback_after
+    """
+
+    def __init__(self, engines, parallel=True, min_confidence=0.6, timeout=8.0, fallback_after=3.0, cooldown=60):
+        self.engines = engines
+        self.parallel = parallel
+        self.min_confidence = min_confidence
+        self.timeout = timeout # Overall budget per utterance
+        self.fallback_after = fallback_after
+        self.cooldown = cooldown # Seconds a failing engine is skipped
+        self.pool = ThreadPoolExecutor(max_workers=max(1, len(engines)) * 2, thread_name_prefix="stt")
+        self.lock = threading.Lock()
+        self.health = {e.name: {"calls": 0, "failures": 0, "timeouts": 0, "wins": 0, "latency_ms": None, "down_until": 0}
+                       for e in engines}
+
+    def ranked(self):
+        """Healthy engines first, fastest first. Untried engines rank as fast so they get measured."""
+        now = time.time()
+        with self.lock:
+            return sorted(self.engines, key=lambda e: (self.health[e.name]["down_until"] > now,
+                                                       self.health[e.name]["latency_ms"] or 0))
+
+    def _run(self, engine, audio):
+        start = time.perf_counter()
+        try:
+            text, confidence = engine.recognize(audio)
+            ok = True
+        except sr.UnknownValueError:
+            text, confidence, ok = "", 0.0, True # Engine is fine, the audio just had no speech
+        except Exception as e:
+            print(f"STT Error ({engine.name}): {e}")
+            text, confidence, ok = "", 0.0, False
+        elapsed = (time.perf_counter() - start) * 1000
+        with self.lock:
+            h = self.health[engine.name]
+            h["calls"] += 1
+            if ok:
+                h["latency_ms"] = elapsed if h["latency_ms"] is None else 0.7 * h["latency_ms"] + 0.3 * elapsed
+                h["down_until"] = 0
+            else:
+                h["failures"] += 1
+                h["down_until"] = time.time() + self.cooldown
+        return text.strip(), confidence
+
+    def _timed_out(self, engine):
+        with self.lock:
+            h = self.health[engine.name]
+            h["timeouts"] += 1
+            h["down_until"] = time.time() + self.cooldown
+
+    def transcribe(self, audio):
+        """Best transcription of audio, "" if nothing was understood in time."""
+        waiting = self.ranked()
+        if not waiting: return ""
+        deadline = time.time() + self.timeout
+        pending = {}
+        best = ("", 0.0, None)
+        launch = True
+        while time.time() < deadline and (pending or waiting):
+            if launch and waiting:
+                batch, waiting = (waiting, []) if self.parallel else (waiting[:1], waiting[1:])
+                for engine in batch:
+                    pending[self.pool.submit(self._run, engine, audio)] = engine
+            budget = deadline - time.time()
+            if waiting: budget = min(budget, self.fallback_after)
+            done, _ = wait(pending, timeout=max(0, budget), return_when=FIRST_COMPLETED)
+            # Nothing back within the fallback window (or an engine came back empty): bring in the next one
+            launch = True
+            for future in done:
+                engine = pending.pop(future)
+                text, confidence = future.result()
+                if not text: continue
+                if confidence >= self.min_confidence:
+                    with self.lock: self.health[engine.name]["wins"] += 1
+                    return text
+                if confidence > best[1]: best = (text, confidence, engine)
+                launch = not pending # A weak result is only worth a second opinion when nothing else is running
+        for engine in pending.values():
+            self._timed_out(engine) # Still running at the deadline: prefer the others for a while
+        if best[2]:
+            with self.lock: self.health[best[2].name]["wins"] += 1
+        return best[0]
+
+    # --- DIAGNOSTICS ---
+    def preferred(self):
+        return self.ranked()[0].name if self.engines else None
+
+    def stats(self):
+        with self.lock:
+            return {name: {k: (round(v) if k == "latency_ms" and v else v) for k, v in h.items() if k != "down_until"}
+                    for name, h in self.health.items()}
+
+def build_engines(names, timeout=5.0):
+    engines = []
+    for name in names:
+        backend = BACKENDS.get(name)
+        if backend: engines.append(backend(timeout=timeout))
+        else: print(f"STT Error: unknown engine '{name}'")
+    return engines
+
+stt = SpeechToText(
+    build_engines(getattr(config, 'STT_ENGINES', ["google", "sphinx"]), getattr(config, 'STT_ENGINE_TIMEOUT', 5.0)),
+    parallel=getattr(config, 'STT_PARALLEL', True),
+    min_confidence=getattr(config, 'STT_MIN_CONFIDENCE', 0.6),
+    timeout=getattr(config, 'STT_TIMEOUT', 8.0),
+    fallback_after=getattr(config, 'STT_FALLBACK_AFTER', 3.0),
+)
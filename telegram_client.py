@@ -0,0 +1,125 @@
+import time
+import asyncio
+import threading
+from telegram.ext import Application
+
+class TelegramClient:
+    """
+    One long-lived asyncio loop (own thread) owning one telegram Application: a single Bot with
+    a pooled HTTP client, shared by update polling and by every outgoing message.
+    - submit(coro_fn, ...) / send_message() return concurrent.futures.Future, callable from any thread
+    - send() is the blocking wrapper for callers that want the (ok, msg) result
+    - polling that failed or died (network down) is restarted in the background: kicked by the next
+      submit() (which does not wait for it) and retried every check_s
+    """
+
+    def __init__(self, token, handlers=None, polling=True, pool_size=8, base_url=None, check_s=60):
+        builder = Application.builder().token(token).connection_pool_size(pool_size).pool_timeout(10)
+        if base_url: builder = builder.base_url(base_url)
+        self.app = builder.build()
+        for handler in handlers or []: self.app.add_handler(handler)
+        self.polling = polling
+        self.check_s = check_s
+        self.poll_lock = asyncio.Lock() # Sends and the watchdog may both try to restart polling
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="telegram-loop", daemon=True)
+        self.started = None
+        self.closed = False # After stop(): the Application and its loop are gone for good
+        self.watchdog = None
+        self.restarting = None # Polling restart kicked off by a send
+        self.stats = {"sent": 0, "failed": 0, "latency_ms": 0.0, "last_error": None}
+
+    @property
+    def bot(self):
+        return self.app.bot
+
+    def start(self):
+        if self.closed: raise RuntimeError("Telegram client is stopped")
+        if self.started: return self.started
+        self.thread.start()
+        self.started = asyncio.run_coroutine_threadsafe(self._startup(), self.loop)
+        if self.polling: self.watchdog = asyncio.run_coroutine_threadsafe(self._watch_polling(), self.loop)
+        return self.started
+
+    async def _startup(self):
+        try:
+            await self.app.initialize() # Opens the HTTP pool once; every later request reuses it
+        except Exception as e:
+            print(f"Telegram Startup Error: {e} (retried on the next send)")
+        self._kick_polling() # In the background: sends never wait for polling to come up
+
+    async def _ensure_polling(self):
+        """(Re)starts update polling if it is wanted but not running. No-op while it runs."""
+        if not self.polling: return
+        async with self.poll_lock:
+            await self.app.initialize()
+            if not self.app.updater.running: await self.app.updater.start_polling()
+            if not self.app.running: await self.app.start()
+
+    async def _restart_polling(self):
+        try:
+            await self._ensure_polling()
+        except Exception as e:
+            print(f"Telegram Polling Error: {e} (retried every {self.check_s}s)")
+
+    def _kick_polling(self):
+        """On the loop: starts a polling restart task if polling is down and none is in progress."""
+        if not self.polling or self.poll_lock.locked() or (self.restarting and not self.restarting.done()): return
+        if self.app.updater.running and self.app.running: return
+        self.restarting = self.loop.create_task(self._restart_polling())
+
+    async def _watch_polling(self):
+        while True:
+            await asyncio.sleep(self.check_s)
+            await self._restart_polling()
+
+    def stop(self, timeout=10):
+        if not self.started or self.closed: return
+        if self.watchdog: self.watchdog.cancel()
+        async def shutdown():
+            if self.restarting: self.restarting.cancel()
+            if self.app.updater and self.app.updater.running: await self.app.updater.stop()
+            if self.app.running: await self.app.stop()
+            await self.app.shutdown()
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result(timeout)
+        except Exception as e:
+            print(f"Telegram Shutdown Error: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
+        self.closed = True # Later sends fail at once instead of waiting on a dead loop
+
+    # --- THREAD-SAFE API ---
+    def submit(self, coro_fn, *args, **kwargs):
+        """Runs coro_fn(*args, **kwargs) on the bot's loop once it is up. Returns a concurrent Future."""
+        self.start() # No-op once started; raises once stopped
+        async def run():
+            await asyncio.wrap_future(self.started)
+            await self.app.initialize() # No-op once up; retries if the network was down at startup
+            self._kick_polling()
+            return await coro_fn(*args, **kwargs)
+        return asyncio.run_coroutine_threadsafe(run(), self.loop)
+
+    def send_message(self, chat_id, text, **kwargs):
+        return self.submit(self._send, chat_id, text, **kwargs)
+
+    async def _send(self, chat_id, text, **kwargs):
+        start = time.perf_counter()
+        try:
+            message = await self.bot.send_message(chat_id=chat_id, text=text, **kwargs)
+        except Exception as e:
+            self.stats["failed"] += 1
+            self.stats["last_error"] = str(e)
+            raise
+        elapsed = (time.perf_counter() - start) * 1000
+        self.stats["sent"] += 1
+        self.stats["latency_ms"] = round(elapsed if self.stats["sent"] == 1 else 0.8 * self.stats["latency_ms"] + 0.2 * elapsed, 1)
+        return message
+
+    def send(self, chat_id, text, timeout=30):
+        """Blocking send: (True, msg) / (False, reason)."""
+        try:
+            self.send_message(chat_id, text).result(timeout)
+            return True, "Telegram message sent."
+        except Exception as e:
+            return False, f"Telegram Error: {e}"
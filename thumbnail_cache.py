@@ -0,0 +1,73 @@
+import os
+import threading
+import cv2
+import numpy as np
+
+VIDEO_EXTS = ('.webm', '.mp4', '.avi')
+
+class ThumbnailCache:
+    """
+    Small JPEG previews of security captures and clips, stored next to them in <capture_dir>/thumbs.
+    Made in the background when evidence is logged; older captures are backfilled on start.
+    """
+
+    def __init__(self, capture_dir, width=320, quality=75):
+        self.capture_dir = capture_dir
+        self.thumb_dir = os.path.join(capture_dir, "thumbs")
+        self.width = width
+        self.quality = quality
+        os.makedirs(self.thumb_dir, exist_ok=True)
+
+    def path_for(self, filename):
+        return os.path.join(self.thumb_dir, os.path.splitext(filename)[0] + ".jpg")
+
+    def _first_frame(self, path):
+        if path.endswith(VIDEO_EXTS):
+            cap = cv2.VideoCapture(path)
+            ok, frame = cap.read()
+            cap.release()
+            return frame if ok else None
+        return cv2.imread(path, cv2.IMREAD_REDUCED_COLOR_2) # Decoder-side 2x downscale, cheaper than a full decode
+
+    def make(self, filename, image=None):
+        """Writes the thumbnail (from image, e.g. the JPEG bytes just saved, or from the file). Returns its path."""
+        if not filename: return None
+        thumb = self.path_for(filename)
+        if os.path.exists(thumb): return thumb
+        tmp = None
+        try:
+            if isinstance(image, (bytes, bytearray)):
+                image = cv2.imdecode(np.frombuffer(image, np.uint8), cv2.IMREAD_REDUCED_COLOR_2)
+            frame = image if image is not None else self._first_frame(os.path.join(self.capture_dir, filename))
+            if frame is None: return None
+            h, w = frame.shape[:2]
+            if w > self.width:
+                frame = cv2.resize(frame, (self.width, int(h * self.width / w)), interpolation=cv2.INTER_AREA)
+            # Unique per writer: the backfill, log_event and a retention rename can all make the same thumbnail
+            tmp = f"{thumb}.{os.getpid()}.{threading.get_ident()}.tmp.jpg"
+            cv2.imwrite(tmp, frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            os.replace(tmp, thumb)
+            return thumb
+        except Exception as e:
+            print(f"Thumbnail Error ({filename}): {e}")
+            if tmp and os.path.exists(tmp): os.remove(tmp)
+            return None
+
+    def get(self, filename):
+        """Thumbnail path, generated on the spot if the backfill has not reached it yet."""
+        thumb = self.path_for(filename)
+        return thumb if os.path.exists(thumb) else self.make(filename)
+
+    def remove(self, filename):
+        thumb = self.path_for(filename)
+        if os.path.exists(thumb):
+            try: os.remove(thumb)
+            except OSError: pass
+
+    def backfill(self):
+        """Background pass over captures that predate the cache."""
+        def run():
+            for name in sorted(os.listdir(self.capture_dir), reverse=True): # Newest first: what the gallery shows
+                if name.lower().endswith(('.jpg', '.jpeg', '.png') + VIDEO_EXTS) and not os.path.exists(self.path_for(name)):
+                    self.make(name)
+        threading.Thread(target=run, name="thumbnail-backfill", daemon=True).start()
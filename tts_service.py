@@ -0,0 +1,173 @@
+import heapq
+import itertools
+import threading
+import pyttsx3
+import config
+from phrase_cache import PhraseCache, play_wav, DEFAULT_PREWARM
+
+# Lower value = spoken first
+PRIORITY_SECURITY = 0
+PRIORITY_REMINDER = 5
+PRIORITY_CHAT = 10
+
+class SpeechService:
+    """
+    Sole owner of the pyttsx3 engine.
+    - one long-lived thread initialises the engine once and speaks everything
+    - priority queue: security alerts > reminders > chat answers
+    - a more urgent phrase interrupts a less urgent one, which is spoken again afterwards
+    - an identical phrase that is already waiting is not queued twice
+    - recurring phrases are played from pre-rendered WAVs (PhraseCache), rendered while idle
+    """
+
+    def __init__(self, rate=None, voice=None, cache=None, prewarm=()):
+        self.rate = rate
+        self.voice = voice
+        self.cache = cache
+        self.to_render = list(prewarm) # Rendered whenever nothing is waiting to be spoken
+        self.muted = False
+        self.engine = None
+        self.heap = []
+        self.waiting = {} # normalised text -> queued entry (dedupe)
+        self.current = None
+        self.rendering = False # A pre-warm render is running; anything queued cuts it short
+        self.render_cut = False
+        self.cond = threading.Condition()
+        self.seq = itertools.count()
+        self.counters = {"queued": 0, "spoken": 0, "deduped": 0, "preempted": 0, "failed": 0}
+        self.thread = threading.Thread(target=self._run, name="tts", daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def _key(text):
+        return " ".join(text.lower().split())
+
+    # --- PUBLIC API ---
+    def say(self, text, priority=PRIORITY_CHAT, dedupe=True):
+        """Queues text and returns immediately. False if nothing new was queued."""
+        text = (text or "").strip()
+        if not text or self.muted: return False
+        key = self._key(text) if dedupe else None
+        with self.cond:
+            entry = self.waiting.get(key) if key else None
+            if entry:
+                self.counters["deduped"] += 1
+                if priority < entry["priority"]:
+                    # Same phrase, more urgent caller: move it up, the old entry is skipped
+                    entry["stale"] = True
+                    self._push({"text": text, "key": key, "priority": priority, "seq": next(self.seq)})
+                return False
+            self._push({"text": text, "key": key, "priority": priority, "seq": next(self.seq)})
+            self.counters["queued"] += 1
+            return True
+
+    def _push(self, entry):
+        entry["stale"] = False
+        heapq.heappush(self.heap, (entry["priority"], entry["seq"], entry))
+        if entry["key"]: self.waiting[entry["key"]] = entry
+        self.cond.notify_all()
+
+    def wait_idle(self, timeout=None):
+        """Blocks until everything queued has been spoken."""
+        with self.cond:
+            return self.cond.wait_for(lambda: not self.heap and self.current is None, timeout)
+
+    # --- WORKER ---
+    def _run(self):
+        try:
+            # Initialised on this thread and never re-created: pyttsx3 engines are not thread-safe
+            self.engine = pyttsx3.init()
+            if self.rate: self.engine.setProperty('rate', self.rate)
+            if self.voice: self.engine.setProperty('voice', self.voice)
+            self.engine.connect('started-word', self._on_word)
+            # Cache key uses the effective settings, so a voice change never plays stale audio
+            self.voice = self.engine.getProperty('voice')
+            self.rate = self.engine.getProperty('rate')
+        except Exception as e:
+            print(f"TTS Error: {e}")
+            self.engine = None
+
+        while True:
+            with self.cond:
+                idle_work = self.engine and self.cache and self.to_render
+                self.cond.wait_for(lambda: self.heap, timeout=0.5 if idle_work else None)
+                if not self.heap:
+                    text = self.to_render.pop(0)
+                else:
+                    text = None
+            if text is not None:
+                self.rendering, self.render_cut = True, False
+                self.cache.render(self.engine, text, self.voice, self.rate, cancelled=lambda: self.render_cut)
+                self.rendering = False
+                if self.render_cut: self.to_render.insert(0, text) # Rendered again on the next idle spell
+                continue
+            with self.cond:
+                _, _, entry = heapq.heappop(self.heap)
+                if entry["stale"]: continue
+                if entry["key"] and self.waiting.get(entry["key"]) is entry:
+                    del self.waiting[entry["key"]]
+                entry["interrupted"] = False
+                self.current = entry
+            self._speak(entry)
+            with self.cond:
+                self.current = None
+                if entry["interrupted"] and not (entry["key"] and entry["key"] in self.waiting):
+                    # Put it back in its original place; it restarts after the urgent phrase
+                    self._push(entry)
+                self.cond.notify_all()
+
+    def _speak(self, entry):
+        if not self.engine or self.muted: return
+        try:
+            # Chat sentences (no dedupe key) are one-offs and are never cached
+            path = self.cache.get(entry["text"], self.voice, self.rate) if self.cache and entry["key"] else None
+            if path and play_wav(path, lambda: self._preempt(entry)):
+                if not entry["interrupted"]: self.counters["spoken"] += 1
+                return
+            if self.cache and entry["key"] and self.cache.wants(entry["text"], self.voice, self.rate):
+                if entry["text"] not in self.to_render: self.to_render.append(entry["text"])
+            self.engine.say(entry["text"])
+            self.engine.runAndWait()
+            if not entry["interrupted"]: self.counters["spoken"] += 1
+        except Exception as e:
+            print(f"TTS Error: {e}")
+            self.counters["failed"] += 1
+
+    def _preempt(self, current):
+        """True (and marks current interrupted) when something more urgent is waiting."""
+        with self.cond:
+            if current["interrupted"]: return True
+            top = self._top_priority()
+            if top is None or top >= current["priority"]: return False
+            current["interrupted"] = True
+            self.counters["preempted"] += 1
+            return True
+
+    def _top_priority(self):
+        """Priority of the most urgent live entry, None if nothing waits (caller holds cond)."""
+        while self.heap and self.heap[0][2]["stale"]: heapq.heappop(self.heap) # Only the head is ordered
+        return self.heap[0][0] if self.heap else None
+
+    def _on_word(self, name, location, length):
+        if self.rendering:
+            # Pre-warming is only idle work: whatever was queued meanwhile goes first
+            with self.cond:
+                if self.render_cut or self._top_priority() is None: return
+                self.render_cut = True
+            self.engine.stop()
+            return
+        current = self.current
+        if current and not current["interrupted"] and self._preempt(current):
+            self.engine.stop()
+
+    # --- DIAGNOSTICS ---
+    def stats(self):
+        with self.cond:
+            return dict(self.counters, pending=len(self.heap))
+
+tts = SpeechService(
+    rate=getattr(config, 'TTS_RATE', None),
+    voice=getattr(config, 'TTS_VOICE', None),
+    cache=PhraseCache(getattr(config, 'TTS_CACHE_DIR', "tts_cache"), getattr(config, 'TTS_CACHE_MAX_MB', 50) * 1024 * 1024),
+    prewarm=getattr(config, 'TTS_PREWARM_PHRASES', DEFAULT_PREWARM),
+)
@@ -33,7 +33,7 @@ def render_desktop_ui(bot, listen_input_func):
                         target = parsed.get('target')
                         val = parsed.get('value')
                         
-                        msg = "Unknown Intent"
+                        ok, msg = False, "Unknown Intent"
                         if intent == 'open_app':
                             ok, msg = bot.open_app(target)
                         elif intent == 'close_app':
@@ -46,6 +46,10 @@ def render_desktop_ui(bot, listen_input_func):
                             ok, msg = bot.set_brightness(int(val))
                         elif intent == 'lock_screen':
                             ok, msg = bot.lock_computer()
+                        elif intent == 'type_text':
+                            ok, msg = bot.type_text(str(val))
+                        elif intent == 'scroll':
+                            ok, msg = bot.scroll(int(val))
                         
                         if ok: st.success(msg)
                         else: st.error(msg)